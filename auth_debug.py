@@ -5,23 +5,118 @@ Investigates the authentication issue with missing 'hashed_password' field
 """
 
 import requests
-import json
 import os
+import sys
 import time
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    _dumps, _loads = orjson.dumps, orjson.loads
+except ImportError:  # stdlib fallback keeps the script runnable without orjson
+    import json
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
 
 # Get backend URL from environment
 BACKEND_URL = os.getenv('REACT_APP_BACKEND_URL', 'https://zoios-erp-2.preview.emergentagent.com')
 API_BASE = f"{BACKEND_URL}/api"
+LOGIN_URL = f"{API_BASE}/auth/login"
+ME_URL = f"{API_BASE}/auth/me"
+
+# Dump full response bodies even on success paths
+VERBOSE = os.getenv('VERBOSE', '').lower() in ('1', 'true', 'yes')
+
+# Shared pooled session so TCP/TLS connections are reused across every probe; auth_fix_test.py imports it too
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+)
+SESSION.mount('http://', _ADAPTER)
+SESSION.mount('https://', _ADAPTER)
+SESSION.headers.update({
+    "User-Agent": "zoios-authtest/1.0",
+    "Accept-Encoding": "gzip",
+    "Connection": "keep-alive",
+})
+
+# Level prefixes and banner rules are built once instead of per log call; the banners are shared with auth_fix_test.py
+_PREFIX = {"INFO": "INFO: ", "WARNING": "WARNING: ", "ERROR": "ERROR: "}
+BAR40 = "=" * 40
+_BAR60 = "=" * 60
+BAR80 = "=" * 80
+
+_SIGNUP_TEMPLATE = {
+    "password": "password123",
+    "name": "Auth Test User",
+    "company": "Auth Test Company"
+}
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+def rjson(resp):
+    """Decode a JSON body straight from the raw response bytes"""
+    return _loads(resp.content)
+
+def parse(resp):
+    """Decode a JSON body only for successful responses"""
+    return rjson(resp) if resp.status_code == 200 else None
+
+def post_json(session, url, body, headers=None):
+    """POST a pre-encoded JSON body"""
+    return session.post(url, data=_dumps(body), headers={**_JSON_HEADERS, **headers} if headers else _JSON_HEADERS)
 
 def log(message, level="INFO"):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    prefix = _PREFIX.get(level) or f"{level}: "
+    sys.stdout.write("[" + timestamp + "] " + prefix + str(message) + "\n")
+    if level != "INFO":
+        sys.stdout.flush()
+
+def warm_pool():
+    """Open the backend connection up front so the first login skips DNS/TCP/TLS setup"""
+    try:
+        SESSION.head(f"{BACKEND_URL}/", timeout=5)
+    except requests.RequestException as e:
+        log(f"Connection warm-up failed: {str(e)}", "WARNING")
+
+def probe_account(session, email, password):
+    """Login and verify the token against /auth/me; returns (ok, token)"""
+    response = post_json(session, LOGIN_URL, {"email": email, "password": password})
+    log(f"Login status for {email}: {response.status_code}")
+    if VERBOSE:
+        log(f"Login response: {response.text}")
+    
+    if response.status_code != 200:
+        if response.status_code == 401:
+            log(f"❌ Invalid credentials: {email}")
+        else:
+            log(f"❌ Login failed for {email}: {response.text}")
+        return False, None
+    
+    log(f"✅ SUCCESS: {email} login works!")
+    token = parse(response).get('access_token')
+    
+    me_response = session.get(ME_URL, headers={"Authorization": "Bearer " + token})
+    if me_response.status_code != 200:
+        log(f"❌ /auth/me fails for {email}: {me_response.text}")
+        return False, token
+    
+    log(f"✅ /auth/me works for {email}")
+    if VERBOSE:
+        log(f"/auth/me response: {me_response.text}")
+    return True, token
 
 def test_authentication_issue():
     """Test authentication to identify the hashed_password issue"""
     log("🔍 INVESTIGATING AUTHENTICATION ISSUE")
-    log("=" * 60)
+    log(_BAR60)
     
     # Test known credentials that might exist
     test_accounts = [
@@ -30,35 +125,15 @@ def test_authentication_issue():
         {"email": "testuser1759581426@example.com", "password": "password123"},
     ]
     
-    session = requests.Session()
+    session = SESSION
     
     for account in test_accounts:
         log(f"Testing login with: {account['email']}")
         
         try:
-            response = session.post(f"{API_BASE}/auth/login", json=account)
-            log(f"Response status: {response.status_code}")
-            log(f"Response text: {response.text}")
-            
-            if response.status_code == 200:
-                log(f"✅ SUCCESS: {account['email']} login works!")
-                data = response.json()
-                token = data.get('access_token')
-                
-                # Test /auth/me endpoint
-                headers = {"Authorization": f"Bearer {token}"}
-                me_response = session.get(f"{API_BASE}/auth/me", headers=headers)
-                log(f"/auth/me status: {me_response.status_code}")
-                log(f"/auth/me response: {me_response.text}")
-                
-                if me_response.status_code == 200:
-                    log("✅ /auth/me endpoint working")
-                    return True, account
-                else:
-                    log("❌ /auth/me endpoint failing")
-            else:
-                log(f"❌ Login failed: {response.text}")
-                
+            ok, _ = probe_account(session, account['email'], account['password'])
+            if ok:
+                return True, account
         except Exception as e:
             log(f"❌ Error testing {account['email']}: {str(e)}")
     
@@ -68,39 +143,34 @@ def test_authentication_issue():
 def create_fresh_account():
     """Create a fresh account to test authentication"""
     log("🆕 CREATING FRESH ACCOUNT")
-    log("=" * 40)
+    log(BAR40)
     
-    timestamp = str(int(time.time()))
-    fresh_email = f"authtest{timestamp}@example.com"
-    fresh_password = "password123"
+    ts = time.time_ns() // 1_000_000_000
+    fresh_email = f"authtest{ts}@example.com"
+    fresh_password = _SIGNUP_TEMPLATE["password"]
     
-    signup_data = {
-        "email": fresh_email,
-        "password": fresh_password,
-        "name": "Auth Test User",
-        "company": "Auth Test Company"
-    }
+    signup_data = {**_SIGNUP_TEMPLATE, "email": fresh_email}
     
-    session = requests.Session()
+    session = SESSION
     
     try:
-        response = session.post(f"{API_BASE}/auth/signup", json=signup_data)
+        response = post_json(session, f"{API_BASE}/auth/signup", signup_data)
         log(f"Signup response status: {response.status_code}")
-        log(f"Signup response: {response.text}")
+        if VERBOSE:
+            log(f"Signup response: {response.text}")
         
         if response.status_code == 200:
             log("✅ Fresh account created successfully")
-            data = response.json()
-            token = data.get('access_token')
             
             # Test immediate login
-            login_response = session.post(f"{API_BASE}/auth/login", json={
+            login_response = post_json(session, LOGIN_URL, {
                 "email": fresh_email,
                 "password": fresh_password
             })
             
             log(f"Fresh login status: {login_response.status_code}")
-            log(f"Fresh login response: {login_response.text}")
+            if login_response.status_code != 200 or VERBOSE:
+                log(f"Fresh login response: {login_response.text}")
             
             if login_response.status_code == 200:
                 log("✅ Fresh account login works")
@@ -118,7 +188,8 @@ def create_fresh_account():
 
 def main():
     log("🚀 AUTHENTICATION ISSUE INVESTIGATION")
-    log("=" * 80)
+    log(BAR80)
+    warm_pool()
     
     # First try existing accounts
     success, working_account = test_authentication_issue()
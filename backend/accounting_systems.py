@@ -2,7 +2,18 @@
 Accounting systems and chart of accounts templates for different countries
 """
 
-from typing import Dict, List, Any
+import sys
+import orjson
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, NamedTuple
+
+class AccountRow(NamedTuple):
+    """One line of a chart of accounts template"""
+    code: str
+    name: str
+    type: str
+    category: str
 
 # Accounting systems by country
 ACCOUNTING_SYSTEMS = {
@@ -92,113 +103,113 @@ ACCOUNTING_SYSTEMS = {
 CHART_OF_ACCOUNTS_TEMPLATES = {
     "us_gaap": {
         "assets": [
-            {"code": "1000", "name": "Cash and Cash Equivalents", "type": "asset", "category": "current_asset"},
-            {"code": "1100", "name": "Accounts Receivable", "type": "asset", "category": "current_asset"},
-            {"code": "1200", "name": "Inventory", "type": "asset", "category": "current_asset"},
-            {"code": "1300", "name": "Prepaid Expenses", "type": "asset", "category": "current_asset"},
-            {"code": "1500", "name": "Property, Plant & Equipment", "type": "asset", "category": "fixed_asset"},
-            {"code": "1600", "name": "Accumulated Depreciation", "type": "asset", "category": "fixed_asset"},
-            {"code": "1700", "name": "Intangible Assets", "type": "asset", "category": "fixed_asset"},
+            AccountRow("1000", "Cash and Cash Equivalents", "asset", "current_asset"),
+            AccountRow("1100", "Accounts Receivable", "asset", "current_asset"),
+            AccountRow("1200", "Inventory", "asset", "current_asset"),
+            AccountRow("1300", "Prepaid Expenses", "asset", "current_asset"),
+            AccountRow("1500", "Property, Plant & Equipment", "asset", "fixed_asset"),
+            AccountRow("1600", "Accumulated Depreciation", "asset", "fixed_asset"),
+            AccountRow("1700", "Intangible Assets", "asset", "fixed_asset"),
         ],
         "liabilities": [
-            {"code": "2000", "name": "Accounts Payable", "type": "liability", "category": "current_liability"},
-            {"code": "2100", "name": "Accrued Expenses", "type": "liability", "category": "current_liability"},
-            {"code": "2200", "name": "Short-term Debt", "type": "liability", "category": "current_liability"},
-            {"code": "2300", "name": "Payroll Liabilities", "type": "liability", "category": "current_liability"},
-            {"code": "2500", "name": "Long-term Debt", "type": "liability", "category": "long_term_liability"},
-            {"code": "2600", "name": "Deferred Tax Liability", "type": "liability", "category": "long_term_liability"},
+            AccountRow("2000", "Accounts Payable", "liability", "current_liability"),
+            AccountRow("2100", "Accrued Expenses", "liability", "current_liability"),
+            AccountRow("2200", "Short-term Debt", "liability", "current_liability"),
+            AccountRow("2300", "Payroll Liabilities", "liability", "current_liability"),
+            AccountRow("2500", "Long-term Debt", "liability", "long_term_liability"),
+            AccountRow("2600", "Deferred Tax Liability", "liability", "long_term_liability"),
         ],
         "equity": [
-            {"code": "3000", "name": "Common Stock", "type": "equity", "category": "equity"},
-            {"code": "3100", "name": "Retained Earnings", "type": "equity", "category": "equity"},
-            {"code": "3200", "name": "Additional Paid-in Capital", "type": "equity", "category": "equity"},
+            AccountRow("3000", "Common Stock", "equity", "equity"),
+            AccountRow("3100", "Retained Earnings", "equity", "equity"),
+            AccountRow("3200", "Additional Paid-in Capital", "equity", "equity"),
         ],
         "revenue": [
-            {"code": "4000", "name": "Sales Revenue", "type": "revenue", "category": "operating_revenue"},
-            {"code": "4100", "name": "Service Revenue", "type": "revenue", "category": "operating_revenue"},
-            {"code": "4900", "name": "Other Revenue", "type": "revenue", "category": "non_operating_revenue"},
+            AccountRow("4000", "Sales Revenue", "revenue", "operating_revenue"),
+            AccountRow("4100", "Service Revenue", "revenue", "operating_revenue"),
+            AccountRow("4900", "Other Revenue", "revenue", "non_operating_revenue"),
         ],
         "expenses": [
-            {"code": "5000", "name": "Cost of Goods Sold", "type": "expense", "category": "cost_of_sales"},
-            {"code": "6000", "name": "Salaries and Wages", "type": "expense", "category": "operating_expense"},
-            {"code": "6100", "name": "Rent Expense", "type": "expense", "category": "operating_expense"},
-            {"code": "6200", "name": "Utilities Expense", "type": "expense", "category": "operating_expense"},
-            {"code": "6300", "name": "Marketing Expense", "type": "expense", "category": "operating_expense"},
-            {"code": "6400", "name": "Depreciation Expense", "type": "expense", "category": "operating_expense"},
-            {"code": "7000", "name": "Interest Expense", "type": "expense", "category": "financial_expense"},
+            AccountRow("5000", "Cost of Goods Sold", "expense", "cost_of_sales"),
+            AccountRow("6000", "Salaries and Wages", "expense", "operating_expense"),
+            AccountRow("6100", "Rent Expense", "expense", "operating_expense"),
+            AccountRow("6200", "Utilities Expense", "expense", "operating_expense"),
+            AccountRow("6300", "Marketing Expense", "expense", "operating_expense"),
+            AccountRow("6400", "Depreciation Expense", "expense", "operating_expense"),
+            AccountRow("7000", "Interest Expense", "expense", "financial_expense"),
         ]
     },
     "uk_gaap": {
         "assets": [
-            {"code": "1000", "name": "Cash at Bank and in Hand", "type": "asset", "category": "current_asset"},
-            {"code": "1100", "name": "Trade Debtors", "type": "asset", "category": "current_asset"},
-            {"code": "1200", "name": "Stock", "type": "asset", "category": "current_asset"},
-            {"code": "1300", "name": "Prepayments", "type": "asset", "category": "current_asset"},
-            {"code": "1500", "name": "Tangible Fixed Assets", "type": "asset", "category": "fixed_asset"},
-            {"code": "1600", "name": "Accumulated Depreciation", "type": "asset", "category": "fixed_asset"},
-            {"code": "1700", "name": "Intangible Assets", "type": "asset", "category": "fixed_asset"},
+            AccountRow("1000", "Cash at Bank and in Hand", "asset", "current_asset"),
+            AccountRow("1100", "Trade Debtors", "asset", "current_asset"),
+            AccountRow("1200", "Stock", "asset", "current_asset"),
+            AccountRow("1300", "Prepayments", "asset", "current_asset"),
+            AccountRow("1500", "Tangible Fixed Assets", "asset", "fixed_asset"),
+            AccountRow("1600", "Accumulated Depreciation", "asset", "fixed_asset"),
+            AccountRow("1700", "Intangible Assets", "asset", "fixed_asset"),
         ],
         "liabilities": [
-            {"code": "2000", "name": "Trade Creditors", "type": "liability", "category": "current_liability"},
-            {"code": "2100", "name": "Accruals", "type": "liability", "category": "current_liability"},
-            {"code": "2200", "name": "Bank Overdraft", "type": "liability", "category": "current_liability"},
-            {"code": "2300", "name": "PAYE/NI Payable", "type": "liability", "category": "current_liability"},
-            {"code": "2400", "name": "VAT Payable", "type": "liability", "category": "current_liability"},
-            {"code": "2500", "name": "Long Term Loans", "type": "liability", "category": "long_term_liability"},
+            AccountRow("2000", "Trade Creditors", "liability", "current_liability"),
+            AccountRow("2100", "Accruals", "liability", "current_liability"),
+            AccountRow("2200", "Bank Overdraft", "liability", "current_liability"),
+            AccountRow("2300", "PAYE/NI Payable", "liability", "current_liability"),
+            AccountRow("2400", "VAT Payable", "liability", "current_liability"),
+            AccountRow("2500", "Long Term Loans", "liability", "long_term_liability"),
         ],
         "equity": [
-            {"code": "3000", "name": "Share Capital", "type": "equity", "category": "equity"},
-            {"code": "3100", "name": "Retained Profits", "type": "equity", "category": "equity"},
-            {"code": "3200", "name": "Share Premium", "type": "equity", "category": "equity"},
+            AccountRow("3000", "Share Capital", "equity", "equity"),
+            AccountRow("3100", "Retained Profits", "equity", "equity"),
+            AccountRow("3200", "Share Premium", "equity", "equity"),
         ],
         "revenue": [
-            {"code": "4000", "name": "Sales", "type": "revenue", "category": "operating_revenue"},
-            {"code": "4100", "name": "Other Operating Income", "type": "revenue", "category": "operating_revenue"},
-            {"code": "4900", "name": "Investment Income", "type": "revenue", "category": "non_operating_revenue"},
+            AccountRow("4000", "Sales", "revenue", "operating_revenue"),
+            AccountRow("4100", "Other Operating Income", "revenue", "operating_revenue"),
+            AccountRow("4900", "Investment Income", "revenue", "non_operating_revenue"),
         ],
         "expenses": [
-            {"code": "5000", "name": "Cost of Sales", "type": "expense", "category": "cost_of_sales"},
-            {"code": "6000", "name": "Wages and Salaries", "type": "expense", "category": "operating_expense"},
-            {"code": "6100", "name": "Rent and Rates", "type": "expense", "category": "operating_expense"},
-            {"code": "6200", "name": "Light and Heat", "type": "expense", "category": "operating_expense"},
-            {"code": "6300", "name": "Advertising", "type": "expense", "category": "operating_expense"},
-            {"code": "6400", "name": "Depreciation", "type": "expense", "category": "operating_expense"},
-            {"code": "7000", "name": "Interest Payable", "type": "expense", "category": "financial_expense"},
+            AccountRow("5000", "Cost of Sales", "expense", "cost_of_sales"),
+            AccountRow("6000", "Wages and Salaries", "expense", "operating_expense"),
+            AccountRow("6100", "Rent and Rates", "expense", "operating_expense"),
+            AccountRow("6200", "Light and Heat", "expense", "operating_expense"),
+            AccountRow("6300", "Advertising", "expense", "operating_expense"),
+            AccountRow("6400", "Depreciation", "expense", "operating_expense"),
+            AccountRow("7000", "Interest Payable", "expense", "financial_expense"),
         ]
     },
     "indian_gaap": {
         "assets": [
-            {"code": "1000", "name": "Cash and Bank", "type": "asset", "category": "current_asset"},
-            {"code": "1100", "name": "Sundry Debtors", "type": "asset", "category": "current_asset"},
-            {"code": "1200", "name": "Stock/Inventory", "type": "asset", "category": "current_asset"},
-            {"code": "1300", "name": "Advances and Prepayments", "type": "asset", "category": "current_asset"},
-            {"code": "1500", "name": "Fixed Assets", "type": "asset", "category": "fixed_asset"},
-            {"code": "1600", "name": "Accumulated Depreciation", "type": "asset", "category": "fixed_asset"},
+            AccountRow("1000", "Cash and Bank", "asset", "current_asset"),
+            AccountRow("1100", "Sundry Debtors", "asset", "current_asset"),
+            AccountRow("1200", "Stock/Inventory", "asset", "current_asset"),
+            AccountRow("1300", "Advances and Prepayments", "asset", "current_asset"),
+            AccountRow("1500", "Fixed Assets", "asset", "fixed_asset"),
+            AccountRow("1600", "Accumulated Depreciation", "asset", "fixed_asset"),
         ],
         "liabilities": [
-            {"code": "2000", "name": "Sundry Creditors", "type": "liability", "category": "current_liability"},
-            {"code": "2100", "name": "Outstanding Expenses", "type": "liability", "category": "current_liability"},
-            {"code": "2200", "name": "Bank Overdraft", "type": "liability", "category": "current_liability"},
-            {"code": "2300", "name": "TDS Payable", "type": "liability", "category": "current_liability"},
-            {"code": "2400", "name": "GST Payable", "type": "liability", "category": "current_liability"},
-            {"code": "2500", "name": "Long Term Loans", "type": "liability", "category": "long_term_liability"},
+            AccountRow("2000", "Sundry Creditors", "liability", "current_liability"),
+            AccountRow("2100", "Outstanding Expenses", "liability", "current_liability"),
+            AccountRow("2200", "Bank Overdraft", "liability", "current_liability"),
+            AccountRow("2300", "TDS Payable", "liability", "current_liability"),
+            AccountRow("2400", "GST Payable", "liability", "current_liability"),
+            AccountRow("2500", "Long Term Loans", "liability", "long_term_liability"),
         ],
         "equity": [
-            {"code": "3000", "name": "Capital", "type": "equity", "category": "equity"},
-            {"code": "3100", "name": "Reserves and Surplus", "type": "equity", "category": "equity"},
+            AccountRow("3000", "Capital", "equity", "equity"),
+            AccountRow("3100", "Reserves and Surplus", "equity", "equity"),
         ],
         "revenue": [
-            {"code": "4000", "name": "Sales/Revenue", "type": "revenue", "category": "operating_revenue"},
-            {"code": "4100", "name": "Other Income", "type": "revenue", "category": "operating_revenue"},
+            AccountRow("4000", "Sales/Revenue", "revenue", "operating_revenue"),
+            AccountRow("4100", "Other Income", "revenue", "operating_revenue"),
         ],
         "expenses": [
-            {"code": "5000", "name": "Cost of Goods Sold", "type": "expense", "category": "cost_of_sales"},
-            {"code": "6000", "name": "Salary and Wages", "type": "expense", "category": "operating_expense"},
-            {"code": "6100", "name": "Rent", "type": "expense", "category": "operating_expense"},
-            {"code": "6200", "name": "Electricity", "type": "expense", "category": "operating_expense"},
-            {"code": "6300", "name": "Advertisement", "type": "expense", "category": "operating_expense"},
-            {"code": "6400", "name": "Depreciation", "type": "expense", "category": "operating_expense"},
-            {"code": "7000", "name": "Interest on Loans", "type": "expense", "category": "financial_expense"},
+            AccountRow("5000", "Cost of Goods Sold", "expense", "cost_of_sales"),
+            AccountRow("6000", "Salary and Wages", "expense", "operating_expense"),
+            AccountRow("6100", "Rent", "expense", "operating_expense"),
+            AccountRow("6200", "Electricity", "expense", "operating_expense"),
+            AccountRow("6300", "Advertisement", "expense", "operating_expense"),
+            AccountRow("6400", "Depreciation", "expense", "operating_expense"),
+            AccountRow("7000", "Interest on Loans", "expense", "financial_expense"),
         ]
     }
 }
@@ -273,43 +284,107 @@ COUNTRIES = {
     "SA": {"name": "Saudi Arabia", "code": "SA", "phone_code": "+966"},
 }
 
+def _freeze(table: Dict[str, Any]) -> Mapping[str, Any]:
+    """Return a read-only view of a lookup table with interned keys"""
+    return MappingProxyType({sys.intern(key): value for key, value in table.items()})
+
+# The lookup tables are read-only for the lifetime of the process
+ACCOUNTING_SYSTEMS = _freeze(ACCOUNTING_SYSTEMS)
+CHART_OF_ACCOUNTS_TEMPLATES = _freeze(CHART_OF_ACCOUNTS_TEMPLATES)
+CURRENCIES = _freeze(CURRENCIES)
+COUNTRIES = _freeze(COUNTRIES)
+
+# Fallbacks for unknown codes
+_DEFAULT_ACCOUNTING_SYSTEM = ACCOUNTING_SYSTEMS["US"]
+_DEFAULT_CHART_OF_ACCOUNTS = CHART_OF_ACCOUNTS_TEMPLATES["us_gaap"]
+_DEFAULT_CURRENCY = CURRENCIES["USD"]
+_DEFAULT_COUNTRY = COUNTRIES["US"]
+
+@lru_cache(maxsize=256)
 def get_accounting_system(country_code: str) -> Dict[str, Any]:
     """Get accounting system for a country"""
-    return ACCOUNTING_SYSTEMS.get(country_code, ACCOUNTING_SYSTEMS["US"])
+    try:
+        return ACCOUNTING_SYSTEMS[country_code]
+    except KeyError:
+        return _DEFAULT_ACCOUNTING_SYSTEM
 
-def get_chart_of_accounts(accounting_system: str) -> Dict[str, List[Dict]]:
+@lru_cache(maxsize=256)
+def get_chart_of_accounts(accounting_system: str) -> Dict[str, List[AccountRow]]:
     """Get chart of accounts for an accounting system"""
-    return CHART_OF_ACCOUNTS_TEMPLATES.get(accounting_system, CHART_OF_ACCOUNTS_TEMPLATES["us_gaap"])
+    try:
+        return CHART_OF_ACCOUNTS_TEMPLATES[accounting_system]
+    except KeyError:
+        return _DEFAULT_CHART_OF_ACCOUNTS
 
+@lru_cache(maxsize=None)
+def get_chart_of_accounts_columns(accounting_system: str) -> tuple:
+    """Get a chart of accounts flattened to (codes, names, types, categories) columns"""
+    rows = [row for section in get_chart_of_accounts(accounting_system).values() for row in section]
+    return tuple(zip(*rows)) if rows else ((), (), (), ())
+
+@lru_cache(maxsize=256)
 def get_currency_info(currency_code: str) -> Dict[str, Any]:
     """Get currency information"""
-    return CURRENCIES.get(currency_code, CURRENCIES["USD"])
+    try:
+        return CURRENCIES[currency_code]
+    except KeyError:
+        return _DEFAULT_CURRENCY
 
+@lru_cache(maxsize=256)
 def get_country_info(country_code: str) -> Dict[str, Any]:
     """Get country information"""
-    return COUNTRIES.get(country_code, COUNTRIES["US"])
+    try:
+        return COUNTRIES[country_code]
+    except KeyError:
+        return _DEFAULT_COUNTRY
+
+# The country/currency tables never change, so their listings are built once at import
+# Country code -> (accounting system name, default currency)
+_COUNTRY_DEFAULTS = {
+    code: (
+        ACCOUNTING_SYSTEMS[code]["name"] if code in ACCOUNTING_SYSTEMS else "International GAAP",
+        ACCOUNTING_SYSTEMS[code]["currency"] if code in ACCOUNTING_SYSTEMS else "USD",
+    )
+    for code in COUNTRIES
+}
+
+_AVAILABLE_COUNTRIES = [
+    {
+        "code": code,
+        "name": details["name"],
+        "phone_code": details["phone_code"],
+        "accounting_system": _COUNTRY_DEFAULTS[code][0],
+        "currency": _COUNTRY_DEFAULTS[code][1],
+    }
+    for code, details in COUNTRIES.items()
+]
+
+_AVAILABLE_CURRENCIES = [
+    {
+        "code": code,
+        "name": details["name"],
+        "symbol": details["symbol"],
+        "decimal_places": details["decimal_places"],
+    }
+    for code, details in CURRENCIES.items()
+]
+
+# Pre-serialized response bodies for the setup endpoints
+_AVAILABLE_COUNTRIES_JSON = orjson.dumps(_AVAILABLE_COUNTRIES)
+_AVAILABLE_CURRENCIES_JSON = orjson.dumps(_AVAILABLE_CURRENCIES)
 
 def get_available_countries() -> List[Dict[str, Any]]:
     """Get list of available countries"""
-    return [
-        {
-            "code": code,
-            "name": details["name"],
-            "phone_code": details["phone_code"],
-            "accounting_system": ACCOUNTING_SYSTEMS.get(code, {}).get("name", "International GAAP"),
-            "currency": ACCOUNTING_SYSTEMS.get(code, {}).get("currency", "USD")
-        }
-        for code, details in COUNTRIES.items()
-    ]
+    return _AVAILABLE_COUNTRIES
 
 def get_available_currencies() -> List[Dict[str, Any]]:
     """Get list of available currencies"""
-    return [
-        {
-            "code": code,
-            "name": details["name"],
-            "symbol": details["symbol"],
-            "decimal_places": details["decimal_places"]
-        }
-        for code, details in CURRENCIES.items()
-    ]
\ No newline at end of file
+    return _AVAILABLE_CURRENCIES
+
+def get_available_countries_bytes() -> bytes:
+    """Get the available countries list as a JSON body"""
+    return _AVAILABLE_COUNTRIES_JSON
+
+def get_available_currencies_bytes() -> bytes:
+    """Get the available currencies list as a JSON body"""
+    return _AVAILABLE_CURRENCIES_JSON
@@ -1,26 +1,132 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
+import asyncio
+import base64
 import hashlib
+import hmac
+import jwt
+import orjson
 import secrets
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
-import uuid
+import re
+from pydantic import BaseModel, ConfigDict, Field
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Mapping
+
+def _new_id() -> str:
+    """Opaque random document ID (32 hex chars) straight from the CSPRNG"""
+    return secrets.token_hex(16)
+
+def _utcnow() -> datetime:
+    """Timezone-aware creation timestamp used as the models' default factory"""
+    return datetime.now(timezone.utc)
 
 # Configuration
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "your-secret-key-change-this-in-production")
+# Encoded once; signing and verification take the key as bytes
+_SECRET_BYTES = SECRET_KEY.encode("utf-8")
 ALGORITHM = "HS256"
+_ALGORITHMS = [ALGORITHM]
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRES = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+# In-process cache of verified tokens: token digest -> (expiry epoch, subject email).
+# A hit only skips re-checking the signature and claims; the user (role, is_active,
+# permissions) is still read on every request, so a delete, deactivation or demotion
+# takes effect immediately on every worker. Entries live until the token's exp or
+# AUTH_CACHE_TTL_SECONDS, whichever comes first
+AUTH_CACHE_MAX_SIZE = 50_000
+AUTH_CACHE_TTL_SECONDS = 60
+_auth_cache: Dict[bytes, tuple] = {}
+
+# Password hashing: scrypt with a per-password random salt, stored as
+# "scrypt$n$r$p$<salt hex>$<hash hex>". Older hashes are still accepted and
+# upgraded on the next successful login: "b2$"-tagged keyed BLAKE2b, and
+# untagged static-salt SHA-256.
+_SCRYPT_PREFIX = "scrypt$"
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+_SCRYPT_MAXMEM = 64 * 1024 * 1024
+_SALT = b"salt_zoios"
+_BLAKE2_PREFIX = "b2$"
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=_SCRYPT_MAXMEM, dklen=32)
+
+def _legacy_hash_password(password: str) -> str:
+    h = hashlib.sha256()
+    h.update(password.encode('utf-8'))
+    h.update(_SALT)
+    return h.hexdigest()
+
+def _blake2_hash_password(password: str) -> str:
+    return _BLAKE2_PREFIX + hashlib.blake2b(password.encode('utf-8'), key=_SALT, digest_size=32).hexdigest()
 
-# Simple password hashing using hashlib (for demo purposes)
 def hash_password(password: str) -> str:
-    return hashlib.sha256(f"{password}salt_zoios".encode()).hexdigest()
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{_SCRYPT_PREFIX}{SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return not hashed_password.startswith(_SCRYPT_PREFIX)
+
+def _verify_password_uncached(plain_password: str, hashed_password: str) -> bool:
+    if hashed_password.startswith(_SCRYPT_PREFIX):
+        try:
+            _, n, r, p, salt, digest = hashed_password.split("$")
+            expected = bytes.fromhex(digest)
+            actual = _scrypt(plain_password, bytes.fromhex(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(actual, expected)
+    if hashed_password.startswith(_BLAKE2_PREFIX):
+        return hmac.compare_digest(_blake2_hash_password(plain_password), hashed_password)
+    return hmac.compare_digest(_legacy_hash_password(plain_password), hashed_password)
+
+# Short-lived memo of verification results for retried logins, keyed by an
+# HMAC of the password under a per-process random key (never the plaintext or
+# a bare digest) plus the stored hash. Expired entries are dropped on access.
+VERIFY_CACHE_TTL_SECONDS = 5
+VERIFY_CACHE_MAX_SIZE = 1024
+_VERIFY_CACHE_KEY = os.urandom(32)
+_verify_cache: Dict[tuple, tuple] = {}
+
+def _evict_expired_verifications(now: float):
+    # Snapshot first: executor threads may insert while this iterates
+    for key, (expires, _) in list(_verify_cache.items()):
+        if expires > now:
+            continue
+        _verify_cache.pop(key, None)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return hash_password(plain_password) == hashed_password
+    key = (hmac.new(_VERIFY_CACHE_KEY, plain_password.encode('utf-8'), hashlib.sha256).digest(), hashed_password)
+    now = time.monotonic()
+    cached = _verify_cache.get(key)
+    if cached is not None:
+        if cached[0] > now:
+            return cached[1]
+        _verify_cache.pop(key, None)
+    result = _verify_password_uncached(plain_password, hashed_password)
+    # Sweep on every miss so entries do not outlive their TTL on a quiet server
+    _evict_expired_verifications(now)
+    if len(_verify_cache) >= VERIFY_CACHE_MAX_SIZE:
+        _verify_cache.clear()
+    _verify_cache[key] = (now + VERIFY_CACHE_TTL_SECONDS, result)
+    return result
+
+# Verified against when the email is unknown; never matches a real password
+_DUMMY_HASH = hash_password(secrets.token_hex(16))
+
+# The KDF is deliberately slow, so async callers run it on the default executor
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(None, hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(None, verify_password, plain_password, hashed_password)
 
 # OAuth2 scheme
 security = HTTPBearer()
@@ -32,111 +138,115 @@ def set_database(database):
     global db
     db = database
 
+# Default permission sets by role; unknown roles get the viewer set
+_ROLE_PERMISSIONS: Dict[str, Mapping[str, bool]] = {
+    "super_admin": MappingProxyType({
+        "view_all_companies": True,
+        "manage_all_companies": True,
+        "create_companies": True,
+        "delete_companies": True,
+        "manage_users": True,
+        "view_all_accounts": True,
+        "manage_accounts": True,
+        "export_data": True,
+        "view_reports": True,
+        "manage_sister_companies": True,
+        "access_hr_module": True,
+        "access_crm_module": True,
+        "access_sales_module": True,
+        "access_purchase_module": True,
+        "access_inventory_module": True,
+        "access_academy_module": True,
+        "access_email_module": True
+    }),
+    "admin": MappingProxyType({
+        "view_all_companies": False,  # Only own company
+        "manage_all_companies": False,
+        "create_companies": True,
+        "delete_companies": True,
+        "manage_users": True,
+        "view_all_accounts": True,
+        "manage_accounts": True,
+        "export_data": True,
+        "view_reports": True,
+        "manage_sister_companies": True,
+        "access_hr_module": True,
+        "access_crm_module": True,
+        "access_sales_module": True,
+        "access_purchase_module": True,
+        "access_inventory_module": True,
+        "access_academy_module": True,
+        "access_email_module": True
+    }),
+    "manager": MappingProxyType({
+        "view_all_companies": False,
+        "manage_all_companies": False,
+        "create_companies": False,
+        "delete_companies": False,
+        "manage_users": False,
+        "view_all_accounts": True,
+        "manage_accounts": True,
+        "export_data": True,
+        "view_reports": True,
+        "manage_sister_companies": False,
+        "access_hr_module": True,
+        "access_crm_module": True,
+        "access_sales_module": True,
+        "access_purchase_module": True,
+        "access_inventory_module": False,
+        "access_academy_module": True,
+        "access_email_module": True
+    }),
+    "user": MappingProxyType({
+        "view_all_companies": False,
+        "manage_all_companies": False,
+        "create_companies": False,
+        "delete_companies": False,
+        "manage_users": False,
+        "view_all_accounts": True,
+        "manage_accounts": False,
+        "export_data": False,
+        "view_reports": True,
+        "manage_sister_companies": False,
+        "access_hr_module": False,
+        "access_crm_module": True,
+        "access_sales_module": True,
+        "access_purchase_module": False,
+        "access_inventory_module": False,
+        "access_academy_module": True,
+        "access_email_module": False
+    }),
+    "viewer": MappingProxyType({
+        "view_all_companies": False,
+        "manage_all_companies": False,
+        "create_companies": False,
+        "delete_companies": False,
+        "manage_users": False,
+        "view_all_accounts": True,
+        "manage_accounts": False,
+        "export_data": False,
+        "view_reports": True,
+        "manage_sister_companies": False,
+        "access_hr_module": False,
+        "access_crm_module": False,
+        "access_sales_module": False,
+        "access_purchase_module": False,
+        "access_inventory_module": False,
+        "access_academy_module": False,
+        "access_email_module": False
+    }),
+}
+
 def get_default_permissions(role: str) -> Dict[str, bool]:
     """Get default permissions based on user role"""
-    if role == "super_admin":
-        return {
-            "view_all_companies": True,
-            "manage_all_companies": True,
-            "create_companies": True,
-            "delete_companies": True,
-            "manage_users": True,
-            "view_all_accounts": True,
-            "manage_accounts": True,
-            "export_data": True,
-            "view_reports": True,
-            "manage_sister_companies": True,
-            "access_hr_module": True,
-            "access_crm_module": True,
-            "access_sales_module": True,
-            "access_purchase_module": True,
-            "access_inventory_module": True,
-            "access_academy_module": True,
-            "access_email_module": True
-        }
-    elif role == "admin":
-        return {
-            "view_all_companies": False,  # Only own company
-            "manage_all_companies": False,
-            "create_companies": True,
-            "delete_companies": True,
-            "manage_users": True,
-            "view_all_accounts": True,
-            "manage_accounts": True,
-            "export_data": True,
-            "view_reports": True,
-            "manage_sister_companies": True,
-            "access_hr_module": True,
-            "access_crm_module": True,
-            "access_sales_module": True,
-            "access_purchase_module": True,
-            "access_inventory_module": True,
-            "access_academy_module": True,
-            "access_email_module": True
-        }
-    elif role == "manager":
-        return {
-            "view_all_companies": False,
-            "manage_all_companies": False,
-            "create_companies": False,
-            "delete_companies": False,
-            "manage_users": False,
-            "view_all_accounts": True,
-            "manage_accounts": True,
-            "export_data": True,
-            "view_reports": True,
-            "manage_sister_companies": False,
-            "access_hr_module": True,
-            "access_crm_module": True,
-            "access_sales_module": True,
-            "access_purchase_module": True,
-            "access_inventory_module": False,
-            "access_academy_module": True,
-            "access_email_module": True
-        }
-    elif role == "user":
-        return {
-            "view_all_companies": False,
-            "manage_all_companies": False,
-            "create_companies": False,
-            "delete_companies": False,
-            "manage_users": False,
-            "view_all_accounts": True,
-            "manage_accounts": False,
-            "export_data": False,
-            "view_reports": True,
-            "manage_sister_companies": False,
-            "access_hr_module": False,
-            "access_crm_module": True,
-            "access_sales_module": True,
-            "access_purchase_module": False,
-            "access_inventory_module": False,
-            "access_academy_module": True,
-            "access_email_module": False
-        }
-    else:  # viewer
-        return {
-            "view_all_companies": False,
-            "manage_all_companies": False,
-            "create_companies": False,
-            "delete_companies": False,
-            "manage_users": False,
-            "view_all_accounts": True,
-            "manage_accounts": False,
-            "export_data": False,
-            "view_reports": True,
-            "manage_sister_companies": False,
-            "access_hr_module": False,
-            "access_crm_module": False,
-            "access_sales_module": False,
-            "access_purchase_module": False,
-            "access_inventory_module": False,
-            "access_academy_module": False,
-            "access_email_module": False
-        }
+    # Copy so callers can store or mutate the result without touching the shared table
+    return dict(_ROLE_PERMISSIONS.get(role, _ROLE_PERMISSIONS["viewer"]))
 
 # Models
 class User(BaseModel):
+    # Auth models are never mutated after construction
+    model_config = ConfigDict(frozen=True)
+
     id: str
     email: str
     name: str
@@ -152,7 +262,28 @@ class User(BaseModel):
 class UserInDB(User):
     hashed_password: str
 
+@dataclass(frozen=True, slots=True)
+class UserAuth:
+    """The fields a credential check reads, taken from the raw user document without validation"""
+    id: str
+    email: str
+    hashed_password: str
+    is_active: bool
+    role: str
+
+    @classmethod
+    def from_document(cls, doc: Dict[str, Any]) -> "UserAuth":
+        return cls(
+            id=doc["id"],
+            email=doc["email"],
+            hashed_password=doc.get("hashed_password", ""),
+            is_active=doc.get("is_active", True),
+            role=doc["role"],
+        )
+
 class UserCreate(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     email: str
     password: str
     name: str
@@ -160,13 +291,15 @@ class UserCreate(BaseModel):
     role: str = "user"
 
 class UserSignup(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     email: str
     password: str
     name: str
     company: str
 
 class CompanySetup(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     user_id: str
     company_name: str
     country_code: str
@@ -186,8 +319,8 @@ class CompanySetup(BaseModel):
     tax_number: Optional[str] = None
     registration_number: Optional[str] = None
     setup_completed: bool = False
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=_utcnow)
+    updated_at: datetime = Field(default_factory=_utcnow)
 
 class CompanySetupCreate(BaseModel):
     company_name: str
@@ -209,7 +342,7 @@ class CompanySetupCreate(BaseModel):
     sister_companies: List[Dict[str, Any]] = []  # Added sister companies support
 
 class ChartOfAccount(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     company_id: str
     code: str
     name: str
@@ -217,10 +350,10 @@ class ChartOfAccount(BaseModel):
     category: str  # current_asset, fixed_asset, etc.
     parent_id: Optional[str] = None
     is_active: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=_utcnow)
 
 class SisterCompany(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     group_company_id: str  # Reference to the parent group company
     company_name: str
     country_code: str
@@ -232,8 +365,8 @@ class SisterCompany(BaseModel):
     incorporation_date: Optional[str] = None
     ownership_percentage: Optional[float] = 100.0  # Percentage owned by group
     is_active: bool = True
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=_utcnow)
+    updated_at: datetime = Field(default_factory=_utcnow)
 
 class SisterCompanyCreate(BaseModel):
     company_name: str
@@ -247,7 +380,7 @@ class SisterCompanyCreate(BaseModel):
     ownership_percentage: Optional[float] = 100.0
 
 class ConsolidatedAccount(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     group_company_id: str
     account_code: str
     account_name: str
@@ -255,27 +388,35 @@ class ConsolidatedAccount(BaseModel):
     category: str
     consolidated_balance: float = 0.0
     sister_companies_data: List[Dict] = []  # Individual company balances
-    consolidation_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    consolidation_date: datetime = Field(default_factory=_utcnow)
+    created_at: datetime = Field(default_factory=_utcnow)
+    updated_at: datetime = Field(default_factory=_utcnow)
 
 class PasswordResetToken(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(frozen=True)
+
+    id: str = Field(default_factory=_new_id)
     user_id: str
     token: str
     expires_at: datetime
     used: bool = False
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=_utcnow)
 
 class PasswordReset(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     token: str
     new_password: str
 
 class UserLogin(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     email: str
     password: str
 
 class Token(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     access_token: str
     token_type: str
     user: User
@@ -283,29 +424,89 @@ class Token(BaseModel):
 # Password utilities (using the functions defined above)
 
 # JWT utilities
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+# HS256 signing state built once: the keyed HMAC context is copied per token
+# instead of re-deriving the ipad/opad key blocks, and the header never changes.
+# Verification goes through PyJWT's jwt.decode
+_HMAC_TEMPLATE = hmac.new(_SECRET_BYTES, None, hashlib.sha256)
+_JWT_HEADER_B64 = _b64url(orjson.dumps({"alg": ALGORITHM, "typ": "JWT"}))
+
+def _sign(signing_input: bytes) -> bytes:
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(signing_input)
+    return _b64url(mac.digest())
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-async def get_user_by_email(email: str):
-    user = await db.users.find_one({"email": email})
+        expire = datetime.now(timezone.utc) + ACCESS_TOKEN_EXPIRES
+    payload = {**data, "exp": int(expire.timestamp())}
+    payload_b64 = _b64url(orjson.dumps(payload))
+    signing_input = _JWT_HEADER_B64 + b"." + payload_b64
+    return (signing_input + b"." + _sign(signing_input)).decode()
+
+# Only the fields UserInDB needs; keeps the BSON payload for auth lookups small
+USER_IN_DB_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "email": 1,
+    "name": 1,
+    "company": 1,
+    "role": 1,
+    "is_active": 1,
+    "onboarding_completed": 1,
+    "created_at": 1,
+    "permissions": 1,
+    "company_id": 1,
+    "assigned_companies": 1,
+    "hashed_password": 1,
+}
+
+async def get_user_credentials_by_email(email: str) -> Optional[Dict[str, Any]]:
+    """Raw projected user document; callers validate into UserInDB only when they need the model"""
+    return await db.users.find_one({"email": email}, projection=USER_IN_DB_PROJECTION)
+
+# One lookup task per email; concurrent callers await the same query instead of each hitting Mongo
+_inflight: Dict[str, "asyncio.Task"] = {}
+
+async def _load_user_by_email(email: str):
+    user = await get_user_credentials_by_email(email)
     if user:
         return UserInDB(**user)
     return None
 
+async def get_user_by_email(email: str):
+    task = _inflight.get(email)
+    if task is None:
+        task = asyncio.ensure_future(_load_user_by_email(email))
+        _inflight[email] = task
+        task.add_done_callback(lambda _: _inflight.pop(email, None))
+    # shield: one caller being cancelled must not cancel the lookup the others are waiting on
+    return await asyncio.shield(task)
+
+def _auth_cache_key(token: str) -> bytes:
+    # sha256 goes through OpenSSL (SHA-NI where available); hashlib's blake2 is a portable C build
+    return hashlib.sha256(token.encode()).digest()[:16]
+
 async def authenticate_user(email: str, password: str):
-    user = await get_user_by_email(email)
+    user = await get_user_credentials_by_email(email)
     if not user:
+        # Spend the same KDF time as a real check so unknown emails can't be told apart by timing
+        await verify_password_async(password, _DUMMY_HASH)
         return False
-    if not verify_password(password, user.hashed_password):
+    auth = UserAuth.from_document(user)
+    if not await verify_password_async(password, auth.hashed_password):
         return False
-    return user
+    if password_needs_rehash(auth.hashed_password):
+        # Upgrade legacy hashes now that we have the plaintext
+        new_hash = await hash_password_async(password)
+        await db.users.update_one({"id": auth.id}, {"$set": {"hashed_password": new_hash}})
+        user["hashed_password"] = new_hash
+    # Only a successful login is promoted to the full model the login response is built from
+    return UserInDB(**user)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
@@ -313,15 +514,31 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+    token = credentials.credentials
+    # Anything that isn't header.payload.signature can't be a JWT; reject before decoding
+    if token.count('.') != 2:
+        raise credentials_exception
+    key = _auth_cache_key(token)
+    now = time.time()
+    cached = _auth_cache.get(key)
+    if cached is not None and cached[0] > now:
+        email = cached[1]
+    else:
+        if cached is not None:
+            _auth_cache.pop(key, None)
+        try:
+            payload = jwt.decode(token, _SECRET_BYTES, algorithms=_ALGORITHMS)
+        except jwt.InvalidTokenError:
+            raise credentials_exception
+        email = payload.get("sub")
         if email is None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        # Only successfully verified tokens are cached
+        if len(_auth_cache) >= AUTH_CACHE_MAX_SIZE:
+            _auth_cache.clear()
+        _auth_cache[key] = (min(payload.get("exp", now), now + AUTH_CACHE_TTL_SECONDS), email)
     
+    # Always re-read the user: the projected find_one is served by the unique users.email index
     user = await get_user_by_email(email)
     if user is None:
         raise credentials_exception
@@ -340,19 +557,26 @@ async def get_admin_user(current_user: UserInDB = Depends(get_current_active_use
         )
     return current_user
 
-# Helper function to prepare user data for MongoDB
-def prepare_user_for_mongo(user_data):
-    if isinstance(user_data.get('created_at'), datetime):
-        user_data['created_at'] = user_data['created_at'].isoformat()
-    return user_data
-
-def parse_user_from_mongo(user):
-    if isinstance(user.get('created_at'), str):
-        try:
-            user['created_at'] = datetime.fromisoformat(user['created_at'].replace('Z', '+00:00'))
-        except ValueError:
-            pass
-    return user
+async def ensure_auth_indexes(db):
+    """Create the indexes behind login, token and password-reset lookups"""
+    try:
+        await db.users.create_index("email", unique=True)
+    except Exception as e:
+        print(f"ERROR: Failed to create users.email index: {e}")
+    try:
+        # Admin user management looks users up by id
+        await db.users.create_index("id", unique=True)
+    except Exception as e:
+        print(f"ERROR: Failed to create users.id index: {e}")
+    try:
+        await db.password_reset_tokens.create_index("token", unique=True)
+    except Exception as e:
+        print(f"ERROR: Failed to create password_reset_tokens.token index: {e}")
+    try:
+        # expires_at is a BSON date; Mongo purges tokens once it has passed
+        await db.password_reset_tokens.create_index("expires_at", expireAfterSeconds=0)
+    except Exception as e:
+        print(f"ERROR: Failed to create password_reset_tokens.expires_at index: {e}")
 
 # Create default admin user
 async def create_default_admin(db):
@@ -362,7 +586,7 @@ async def create_default_admin(db):
     
     if not existing_admin:
         admin_user = User(
-            id=str(uuid.uuid4()),
+            id=_new_id(),
             email=admin_email,
             name="ZOIOS Admin",
             company="ZOIOS Systems",
@@ -373,15 +597,14 @@ async def create_default_admin(db):
         )
         
         # Create admin password hash
-        admin_password_hash = hash_password("admin123")
+        admin_password_hash = await hash_password_async("admin123")
         
         admin_data = {
-            **admin_user.dict(),
+            **admin_user.model_dump(mode="python"),
             "hashed_password": admin_password_hash
         }
         
-        prepared_admin = prepare_user_for_mongo(admin_data)
-        await db.users.insert_one(prepared_admin)
+        await db.users.insert_one(admin_data)
         print("Default admin user created: admin@zoios.com / admin123")
 
 async def ensure_super_admin(db):
@@ -395,14 +618,14 @@ async def ensure_super_admin(db):
             "role": "super_admin",
             "permissions": get_default_permissions("super_admin"),
             "assigned_companies": [],  # Super admin can see all companies
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }
         await db.users.update_one({"email": super_admin_email}, {"$set": update_data})
         print(f"Super admin updated: {super_admin_email}")
     else:
         # Create super admin if it doesn't exist
         super_admin_user = User(
-            id=str(uuid.uuid4()),
+            id=_new_id(),
             email=super_admin_email,
             name="Super Admin",
             company="2M Holdings",
@@ -414,22 +637,25 @@ async def ensure_super_admin(db):
         )
         
         # Create super admin password hash
-        super_admin_password_hash = hash_password("admin123")
+        super_admin_password_hash = await hash_password_async("admin123")
         
         super_admin_data = {
-            **super_admin_user.dict(),
+            **super_admin_user.model_dump(mode="python"),
             "hashed_password": super_admin_password_hash,
             "onboarding_completed": True
         }
         
-        prepared_super_admin = prepare_user_for_mongo(super_admin_data)
-        await db.users.insert_one(prepared_super_admin)
+        await db.users.insert_one(super_admin_data)
         print(f"Super admin created: {super_admin_email} / admin123")
 
 # Password reset token utilities
+_RESET_TOKEN_BYTES = 32
+# token_urlsafe(n) yields ceil(4n/3) unpadded base64url characters
+_RESET_TOKEN_RE = re.compile(r"[A-Za-z0-9_-]{%d}" % -(-4 * _RESET_TOKEN_BYTES // 3))
+
 def generate_reset_token():
     """Generate a secure random token for password reset"""
-    return secrets.token_urlsafe(32)
+    return secrets.token_urlsafe(_RESET_TOKEN_BYTES)
 
 async def create_password_reset_token(user_id: str):
     """Create and store a password reset token"""
@@ -442,23 +668,26 @@ async def create_password_reset_token(user_id: str):
         expires_at=expires_at
     )
     
-    prepared_token = prepare_user_for_mongo(reset_token.dict())
-    await db.password_reset_tokens.insert_one(prepared_token)
+    # Datetimes are stored as native BSON dates so the expiry filter and TTL index work on them
+    await db.password_reset_tokens.insert_one(reset_token.model_dump(mode="python"))
     
     return token
 
 async def verify_reset_token(token: str):
     """Verify and return the reset token if valid"""
+    # Anything generate_reset_token couldn't have produced is rejected without a DB round-trip
+    if not isinstance(token, str) or not _RESET_TOKEN_RE.fullmatch(token):
+        return None
     reset_token = await db.password_reset_tokens.find_one({
         "token": token,
         "used": False,
-        "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
+        "expires_at": {"$gt": datetime.now(timezone.utc)}
     })
     
     if not reset_token:
         return None
     
-    return parse_user_from_mongo(reset_token)
+    return reset_token
 
 async def use_reset_token(token: str):
     """Mark a reset token as used"""
@@ -5,21 +5,138 @@ Supports both online rate fetching and manual rate management
 
 import asyncio
 import aiohttp
-import uuid
+import orjson
+import secrets
+import time
+from collections import deque
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Mapping, Tuple
 from pydantic import BaseModel
+from pymongo import UpdateOne
+from accounting_systems import get_currency_info
 import logging
 
-# Helper function for MongoDB preparation
-def prepare_for_mongo(data):
-    """Prepare data for MongoDB storage"""
-    if isinstance(data, dict):
-        return {k: v for k, v in data.items() if v is not None}
-    return data
-
 logger = logging.getLogger(__name__)
 
+# One keep-alive HTTP session for all rate fetches, shared by every service instance
+# and closed from the app's shutdown hook
+_http_session: Optional[aiohttp.ClientSession] = None
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session, creating it on first use"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+    return _http_session
+
+async def close_http_session():
+    """Close the shared HTTP session"""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+# Online rates per base currency: (fetched at, full conversion table). FX rates move slowly,
+# so companies sharing a base currency reuse one fetch for the TTL window
+RATE_CACHE_TTL_SECONDS = 900
+_rate_cache: Dict[str, tuple] = {}
+_rate_locks: Dict[str, asyncio.Lock] = {}
+
+def _cached_rates(base_currency: str) -> Optional[Dict[str, float]]:
+    entry = _rate_cache.get(base_currency)
+    if entry is not None and time.monotonic() - entry[0] < RATE_CACHE_TTL_SECONDS:
+        return entry[1]
+    return None
+
+# Online rate providers; static configuration shared by every service instance
+ONLINE_PROVIDERS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "exchangerate-api": MappingProxyType({
+        "url": "https://v6.exchangerate-api.com/v6/latest/{base_currency}",
+        "requires_key": False,  # They have a free tier
+        "rate_limit": 1500,  # requests per month for free
+    }),
+    "fixer": MappingProxyType({
+        "url": "http://data.fixer.io/api/latest?access_key={api_key}&base={base_currency}",
+        "requires_key": True,
+        "rate_limit": 1000,  # requests per month for free
+    }),
+    "currencyapi": MappingProxyType({
+        "url": "https://api.currencyapi.com/v3/latest?apikey={api_key}&base_currency={base_currency}",
+        "requires_key": True,
+        "rate_limit": 300,  # requests per month for free
+    })
+})
+
+# Mock/fallback rates keyed by (base, target) - in production, these could come from a backup source
+FALLBACK_RATES: Mapping[Tuple[str, str], float] = MappingProxyType({
+    ("INR", "USD"): 0.012,
+    ("INR", "EUR"): 0.011,
+    ("INR", "GBP"): 0.0095,
+    ("INR", "JPY"): 1.85,
+    ("INR", "AUD"): 0.018,
+    ("USD", "INR"): 83.25,
+    ("USD", "EUR"): 0.92,
+    ("USD", "GBP"): 0.79,
+    ("USD", "JPY"): 154.30,
+    ("USD", "AUD"): 1.52,
+    ("EUR", "INR"): 90.45,
+    ("EUR", "USD"): 1.09,
+    ("EUR", "GBP"): 0.86,
+    ("EUR", "JPY"): 167.85,
+    ("EUR", "AUD"): 1.65
+})
+
+class CircuitBreaker:
+    """
+    Opens when the failure ratio over a sliding window reaches the threshold,
+    then rejects calls until the break duration has passed
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        break_duration: float = 30.0,
+        sampling_duration: float = 10.0,
+        min_throughput: int = 5
+    ):
+        self.failure_threshold = failure_threshold
+        self.break_duration = break_duration
+        self.sampling_duration = sampling_duration
+        self.min_throughput = min_throughput
+        self._results: deque = deque()  # (monotonic time, succeeded)
+        self._open_until = 0.0
+    
+    def is_open(self) -> bool:
+        return time.monotonic() < self._open_until
+    
+    def record_success(self):
+        self._record(True)
+    
+    def record_failure(self):
+        self._record(False)
+    
+    def _record(self, succeeded: bool):
+        now = time.monotonic()
+        self._results.append((now, succeeded))
+        cutoff = now - self.sampling_duration
+        while self._results and self._results[0][0] < cutoff:
+            self._results.popleft()
+        if len(self._results) < self.min_throughput:
+            return
+        failures = sum(1 for _, ok in self._results if not ok)
+        if failures / len(self._results) >= self.failure_threshold:
+            self._open_until = now + self.break_duration
+            self._results.clear()
+
+# Bound concurrent upstream requests (keeps in-flight calls within the connector's per-host limit)
+# and stop calling a provider that keeps failing
+_provider_semaphore = asyncio.Semaphore(8)
+_provider_breaker = CircuitBreaker(failure_threshold=0.5, break_duration=30, sampling_duration=10, min_throughput=5)
+
 class ExchangeRate(BaseModel):
     id: str
     base_currency: str
@@ -41,23 +158,7 @@ class CurrencyService:
     
     def __init__(self, db):
         self.db = db
-        self.online_providers = {
-            "exchangerate-api": {
-                "url": "https://v6.exchangerate-api.com/v6/latest/{base_currency}",
-                "requires_key": False,  # They have a free tier
-                "rate_limit": 1500,  # requests per month for free
-            },
-            "fixer": {
-                "url": "http://data.fixer.io/api/latest?access_key={api_key}&base={base_currency}",
-                "requires_key": True,
-                "rate_limit": 1000,  # requests per month for free
-            },
-            "currencyapi": {
-                "url": "https://api.currencyapi.com/v3/latest?apikey={api_key}&base_currency={base_currency}",
-                "requires_key": True,
-                "rate_limit": 300,  # requests per month for free
-            }
-        }
+        self.online_providers = ONLINE_PROVIDERS
         
     async def fetch_online_rates(
         self, 
@@ -93,37 +194,67 @@ class CurrencyService:
         base_currency: str, 
         target_currencies: List[str] = None
     ) -> Dict[str, float]:
-        """Fetch rates from exchangerate-api.com (free tier)"""
-        try:
-            url = f"https://v6.exchangerate-api.com/v6/latest/{base_currency}"
-            
-            async with aiohttp.ClientSession() as session:
+        """Fetch rates from exchangerate-api.com (free tier), served from the TTL cache when fresh"""
+        rates = _cached_rates(base_currency)
+        if rates is None:
+            # Concurrent misses for one base currency wait on a single upstream request
+            lock = _rate_locks.setdefault(base_currency, asyncio.Lock())
+            async with lock:
+                rates = _cached_rates(base_currency)
+                if rates is None:
+                    rates = await self._request_exchangerate_api(base_currency)
+                    if rates:
+                        _rate_cache[base_currency] = (time.monotonic(), rates)
+        
+        # Filter to target currencies if specified
+        if target_currencies:
+            rates = {
+                currency: rate 
+                for currency, rate in rates.items() 
+                if currency in target_currencies
+            }
+        else:
+            # Hand out a copy so callers can't modify the cached table
+            rates = dict(rates)
+        
+        return rates
+    
+    async def _request_exchangerate_api(self, base_currency: str) -> Dict[str, float]:
+        """Request the full rate table for a base currency from exchangerate-api.com"""
+        if _provider_breaker.is_open():
+            # Upstream has been failing; callers fall back to the static rates without waiting on it
+            logger.warning("exchangerate-api circuit open, skipping online fetch")
+            return {}
+        
+        async with _provider_semaphore:
+            try:
+                url = ONLINE_PROVIDERS["exchangerate-api"]["url"].format(base_currency=base_currency)
+                
+                session = await get_http_session()
                 async with session.get(url) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        # orjson parses the raw body directly, skipping the text decode and stdlib json
+                        data = orjson.loads(await response.read())
+                        _provider_breaker.record_success()
                         
                         if data.get("result") == "success":
-                            rates = data.get("conversion_rates", {})
-                            
-                            # Filter to target currencies if specified
-                            if target_currencies:
-                                rates = {
-                                    currency: rate 
-                                    for currency, rate in rates.items() 
-                                    if currency in target_currencies
-                                }
-                            
-                            return rates
+                            return data.get("conversion_rates", {})
                         else:
                             logger.error(f"API error: {data.get('error-type', 'Unknown error')}")
                             return {}
                     else:
+                        # Throttling and server errors count against the upstream; other statuses are our request
+                        if response.status == 429 or response.status >= 500:
+                            _provider_breaker.record_failure()
+                        else:
+                            _provider_breaker.record_success()
                         logger.error(f"HTTP error: {response.status}")
                         return {}
-                        
-        except Exception as e:
-            logger.error(f"Error fetching from exchangerate-api: {e}")
-            return {}
+                            
+            except Exception as e:
+                _provider_breaker.record_failure()
+                logger.error(f"Error fetching from exchangerate-api: {e}")
+                return {}
     
     async def update_company_rates(
         self,
@@ -145,37 +276,46 @@ class CurrencyService:
                     # If online fetch fails, use fallback mock rates
                     online_rates = await self._get_fallback_rates(base_currency, target_currencies)
                 
-                updated_count = 0
+                # One timestamp for the whole batch; datetimes are immutable so it is shared safely
+                now = datetime.now(timezone.utc)
+                operations = []
                 for target_currency in target_currencies:
                     if target_currency in online_rates:
-                        rate_data = ExchangeRate(
-                            id=str(uuid.uuid4()),
-                            base_currency=base_currency,
-                            target_currency=target_currency,
-                            rate=online_rates[target_currency],
-                            source="online" if source == "online" else "fallback",
-                            last_updated=datetime.now(timezone.utc),
-                            company_id=company_id
-                        )
+                        # Built directly from trusted local values; ExchangeRate stays at the API boundary
+                        rate_doc = {
+                            "id": secrets.token_hex(16),
+                            "base_currency": base_currency,
+                            "target_currency": target_currency,
+                            "rate": float(online_rates[target_currency]),
+                            "source": "online" if source == "online" else "fallback",
+                            "last_updated": now,
+                            "is_active": True,
+                            "company_id": company_id
+                        }
                         
                         # Upsert rate (update if exists, insert if not)
-                        await self.db.exchange_rates.update_one(
+                        operations.append(UpdateOne(
                             {
                                 "base_currency": base_currency,
                                 "target_currency": target_currency,
                                 "company_id": company_id
                             },
-                            {"$set": prepare_for_mongo(rate_data.dict())},
+                            {"$set": rate_doc},
                             upsert=True
-                        )
-                        updated_count += 1
+                        ))
+                
+                # All upserts go in one round-trip; unordered so one failure doesn't stop the rest
+                updated_count = 0
+                if operations:
+                    result = await self.db.exchange_rates.bulk_write(operations, ordered=False)
+                    updated_count = result.upserted_count + result.matched_count
                 
                 return {
                     "success": True,
                     "updated_rates": updated_count,
                     "base_currency": base_currency,
                     "target_currencies": list(online_rates.keys()),
-                    "last_updated": datetime.now(timezone.utc).isoformat()
+                    "last_updated": now.isoformat()
                 }
             
             else:
@@ -196,37 +336,12 @@ class CurrencyService:
     
     async def _get_fallback_rates(self, base_currency: str, target_currencies: List[str]) -> Dict[str, float]:
         """Get fallback exchange rates when online APIs fail"""
-        # Mock/fallback rates - in production, these could come from a backup source
-        fallback_rates = {
-            "INR": {
-                "USD": 0.012,
-                "EUR": 0.011,
-                "GBP": 0.0095,
-                "JPY": 1.85,
-                "AUD": 0.018
-            },
-            "USD": {
-                "INR": 83.25,
-                "EUR": 0.92,
-                "GBP": 0.79,
-                "JPY": 154.30,
-                "AUD": 1.52
-            },
-            "EUR": {
-                "INR": 90.45,
-                "USD": 1.09,
-                "GBP": 0.86,
-                "JPY": 167.85,
-                "AUD": 1.65
-            }
+        return {
+            currency: FALLBACK_RATES[(base_currency, currency)]
+            for currency in target_currencies
+            if (base_currency, currency) in FALLBACK_RATES
         }
-        
-        base_rates = fallback_rates.get(base_currency, {})
-        result = {}
-        for currency in target_currencies:
-            if currency in base_rates:
-                result[currency] = base_rates[currency]
-        return result
+    
     async def set_manual_rate(
         self, 
         company_id: str, 
@@ -254,7 +369,7 @@ class CurrencyService:
                 "base_currency": base_currency,
                 "target_currency": target_currency
             },
-            {"$set": rate_data.dict()},
+            {"$set": rate_data.model_dump()},
             upsert=True
         )
         
@@ -297,13 +412,16 @@ class CurrencyService:
                 "rate_source": "same_currency"
             }
         
-        # Find exchange rate
-        rate_doc = await self.db.exchange_rates.find_one({
+        # Forward and reverse rates in one round-trip; at most one document per direction
+        rate_docs = await self.db.exchange_rates.find({
             "company_id": company_id,
-            "base_currency": from_currency,
-            "target_currency": to_currency,
-            "is_active": True
-        })
+            "is_active": True,
+            "$or": [
+                {"base_currency": from_currency, "target_currency": to_currency},
+                {"base_currency": to_currency, "target_currency": from_currency}
+            ]
+        }).to_list(length=2)
+        rate_doc = next((doc for doc in rate_docs if doc["base_currency"] == from_currency), None)
         
         if rate_doc:
             rate = rate_doc["rate"]
@@ -320,12 +438,7 @@ class CurrencyService:
             }
         else:
             # Try reverse conversion
-            reverse_rate_doc = await self.db.exchange_rates.find_one({
-                "company_id": company_id,
-                "base_currency": to_currency,
-                "target_currency": from_currency,
-                "is_active": True
-            })
+            reverse_rate_doc = rate_docs[0] if rate_docs else None
             
             if reverse_rate_doc:
                 rate = 1.0 / reverse_rate_doc["rate"]
@@ -374,16 +487,80 @@ class CurrencyService:
         except Exception as e:
             logger.error(f"Error in scheduled rate update: {e}")
             return {"success": False, "error": str(e)}
+    
+    async def schedule_rate_updates_many(self, company_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Update rates for several companies at once
+        Company setups are loaded in one query, each base currency is fetched online once,
+        and the per-company upserts run concurrently
+        """
+        try:
+            company_setups = await self.db.company_setups.find(
+                {"user_id": {"$in": company_ids}},
+                projection={"_id": 0, "user_id": 1, "base_currency": 1, "additional_currencies": 1}
+            ).to_list(length=None)
+        except Exception as e:
+            logger.error(f"Error loading company setups for scheduled rate update: {e}")
+            return {company_id: {"success": False, "error": str(e)} for company_id in company_ids}
+        
+        setups_by_company = {setup["user_id"]: setup for setup in company_setups}
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for company_id in company_ids:
+            setup = setups_by_company.get(company_id)
+            if not setup:
+                results[company_id] = {"success": False, "error": "Company setup not found"}
+            elif not setup.get("additional_currencies"):
+                results[company_id] = {"success": True, "message": "No additional currencies to update"}
+            else:
+                pending.append(setup)
+        
+        # Warm the rate cache once per base currency so the per-company updates are served from memory
+        base_currencies = {setup.get("base_currency") for setup in pending}
+        await asyncio.gather(*(self.fetch_online_rates(base) for base in base_currencies))
+        
+        updates = await asyncio.gather(*(
+            self.update_company_rates(
+                company_id=setup["user_id"],
+                base_currency=setup.get("base_currency"),
+                target_currencies=setup["additional_currencies"],
+                source="online"
+            )
+            for setup in pending
+        ))
+        for setup, result in zip(pending, updates):
+            results[setup["user_id"]] = result
+        return results
+
+# One long-lived service per database, so the shared HTTP session and rate cache serve every request
+_currency_services: Dict[str, "CurrencyService"] = {}
+
+async def ensure_exchange_rate_indexes(db):
+    """Create the indexes behind rate upserts, conversions and company rate listings"""
+    try:
+        # Unique on the upsert key so each upsert is a single indexed match
+        await db.exchange_rates.create_index(
+            [("company_id", 1), ("base_currency", 1), ("target_currency", 1)],
+            unique=True,
+            name="company_base_target_uniq"
+        )
+        await db.exchange_rates.create_index([("company_id", 1), ("is_active", 1)])
+    except Exception as e:
+        logger.error(f"Failed to create exchange_rates indexes: {e}")
 
 # Utility functions
 async def get_currency_service(db) -> CurrencyService:
     """Get currency service instance"""
-    return CurrencyService(db)
+    service = _currency_services.get(db.name)
+    if service is None:
+        # Tenant databases are created on demand, so indexes are ensured on first use of each one
+        service = CurrencyService(db)
+        _currency_services[db.name] = service
+        await ensure_exchange_rate_indexes(db)
+    return service
 
 def format_currency_amount(amount: float, currency_code: str) -> str:
     """Format amount with currency symbol"""
-    from .accounting_systems import get_currency_info
-    
     currency_info = get_currency_info(currency_code)
     symbol = currency_info.get("symbol", currency_code)
     decimal_places = currency_info.get("decimal_places", 2)
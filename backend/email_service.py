@@ -1,8 +1,13 @@
 import os
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+import asyncio
+import aiosmtplib
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
+from fastapi_mail import ConnectionConfig
 from pydantic import EmailStr
 from jinja2 import Template
-from typing import List
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,8 +26,75 @@ conf = ConnectionConfig(
     VALIDATE_CERTS=True
 )
 
-# Initialize FastMail
-fastmail = FastMail(conf)
+# One SMTP connection is kept open and reused across sends; aiosmtplib is what FastMail
+# uses underneath, but FastMail connects, STARTTLSes and logs in again for every message
+SEND_TIMEOUT_SECONDS = 10
+SEND_ATTEMPTS = 3
+# Connections idle longer than this are checked with NOOP before reuse
+SMTP_IDLE_CHECK_SECONDS = 60
+# Only failures that mean the message never reached the server are retried. A timeout
+# or error after DATA may follow the server accepting it, and a retry would send it twice
+# (SMTPConnectTimeoutError is an SMTPConnectError, so connect timeouts are retried)
+_RETRYABLE_ERRORS = (aiosmtplib.SMTPConnectError, aiosmtplib.SMTPServerDisconnected)
+
+_smtp: Optional[aiosmtplib.SMTP] = None
+_smtp_last_used = 0.0
+# SMTP is a sequential protocol; one message at a time on the shared connection
+_smtp_lock = asyncio.Lock()
+
+async def _connect_smtp() -> aiosmtplib.SMTP:
+    smtp = aiosmtplib.SMTP(
+        hostname=conf.MAIL_SERVER,
+        port=conf.MAIL_PORT,
+        use_tls=conf.MAIL_SSL_TLS,
+        start_tls=conf.MAIL_STARTTLS,
+        validate_certs=conf.VALIDATE_CERTS,
+        timeout=SEND_TIMEOUT_SECONDS
+    )
+    await smtp.connect()
+    if conf.USE_CREDENTIALS:
+        await smtp.login(conf.MAIL_USERNAME, conf.MAIL_PASSWORD.get_secret_value())
+    return smtp
+
+async def _get_smtp() -> aiosmtplib.SMTP:
+    """Return the shared connection, reconnecting if it was dropped or fails a liveness check"""
+    global _smtp
+    if _smtp is not None and _smtp.is_connected and time.monotonic() - _smtp_last_used > SMTP_IDLE_CHECK_SECONDS:
+        try:
+            await _smtp.noop()
+        except aiosmtplib.SMTPException:
+            _smtp.close()
+    if _smtp is None or not _smtp.is_connected:
+        _smtp = await _connect_smtp()
+    return _smtp
+
+def _build_message(subject: str, recipient: str, html_content: str) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr((conf.MAIL_FROM_NAME, conf.MAIL_FROM)) if conf.MAIL_FROM_NAME else conf.MAIL_FROM
+    message["To"] = recipient
+    message.set_content(html_content, subtype="html")
+    return message
+
+async def _send_message(message: EmailMessage):
+    """Send over the shared SMTP connection, retrying connection failures with backoff; other errors raise"""
+    global _smtp, _smtp_last_used
+    for attempt in range(SEND_ATTEMPTS):
+        try:
+            async with _smtp_lock:
+                smtp = await _get_smtp()
+                await asyncio.wait_for(smtp.send_message(message), timeout=SEND_TIMEOUT_SECONDS)
+                _smtp_last_used = time.monotonic()
+            return
+        except Exception as e:
+            # Drop the connection so the next attempt starts from a clean session
+            if _smtp is not None:
+                _smtp.close()
+                _smtp = None
+            if attempt == SEND_ATTEMPTS - 1 or not isinstance(e, _RETRYABLE_ERRORS):
+                raise
+            logger.warning(f"Email send attempt {attempt + 1} failed, retrying: {e}")
+            await asyncio.sleep(2 ** attempt)
 
 # Email templates
 PASSWORD_RESET_TEMPLATE = """
@@ -297,25 +369,23 @@ WELCOME_EMAIL_TEMPLATE = """
 </html>
 """
 
+# Parsed and compiled once; Template() on every send re-lexes the whole HTML body
+_PASSWORD_RESET_TPL = Template(PASSWORD_RESET_TEMPLATE)
+_WELCOME_TPL = Template(WELCOME_EMAIL_TEMPLATE)
+
 async def send_password_reset_email(email: EmailStr, user_name: str, reset_token: str, base_url: str):
     """Send password reset email with reset link"""
     try:
         reset_link = f"{base_url}/reset-password?token={reset_token}"
         
-        template = Template(PASSWORD_RESET_TEMPLATE)
-        html_content = template.render(
+        html_content = _PASSWORD_RESET_TPL.render(
             user_name=user_name,
             reset_link=reset_link
         )
         
-        message = MessageSchema(
-            subject="Reset Your ZOIOS ERP Password",
-            recipients=[email],
-            body=html_content,
-            subtype=MessageType.html
-        )
+        message = _build_message("Reset Your ZOIOS ERP Password", email, html_content)
         
-        await fastmail.send_message(message)
+        await _send_message(message)
         logger.info(f"Password reset email sent to {email}")
         return True
         
@@ -328,8 +398,7 @@ async def send_welcome_email(email: EmailStr, user_name: str, user_company: str,
     try:
         login_url = f"{base_url}/login"
         
-        template = Template(WELCOME_EMAIL_TEMPLATE)
-        html_content = template.render(
+        html_content = _WELCOME_TPL.render(
             user_name=user_name,
             user_email=email,
             user_company=user_company,
@@ -337,14 +406,9 @@ async def send_welcome_email(email: EmailStr, user_name: str, user_company: str,
             login_url=login_url
         )
         
-        message = MessageSchema(
-            subject="Welcome to ZOIOS ERP - Account Created Successfully",
-            recipients=[email],
-            body=html_content,
-            subtype=MessageType.html
-        )
+        message = _build_message("Welcome to ZOIOS ERP - Account Created Successfully", email, html_content)
         
-        await fastmail.send_message(message)
+        await _send_message(message)
         logger.info(f"Welcome email sent to {email}")
         return True
         
@@ -361,14 +425,9 @@ async def send_test_email(email: EmailStr):
         <p>© 2025 ZOIOS ERP System</p>
         """
         
-        message = MessageSchema(
-            subject="ZOIOS ERP - SMTP Test",
-            recipients=[email],
-            body=html_content,
-            subtype=MessageType.html
-        )
+        message = _build_message("ZOIOS ERP - SMTP Test", email, html_content)
         
-        await fastmail.send_message(message)
+        await _send_message(message)
         logger.info(f"Test email sent to {email}")
         return True
         
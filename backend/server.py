@@ -1,39 +1,44 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, status, Request, BackgroundTasks
 from fastapi.security import HTTPBearer
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient, ReturnDocument, WriteConcern
 import os
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Optional, Dict, Any
-import uuid
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 import json
 import base64
+import random
+import time
 from io import BytesIO
 from auth import (
     get_current_active_user, get_admin_user, create_access_token, 
-    authenticate_user, hash_password, set_database, create_default_admin,
-    User, UserCreate, UserSignup, UserLogin, Token, UserInDB, prepare_user_for_mongo, parse_user_from_mongo,
+    authenticate_user, hash_password_async, set_database, create_default_admin,
+    User, UserCreate, UserSignup, UserLogin, Token, UserInDB,
     PasswordReset, create_password_reset_token, verify_reset_token, use_reset_token,
-    CompanySetup, CompanySetupCreate, ChartOfAccount, SisterCompany, SisterCompanyCreate, ConsolidatedAccount
+    CompanySetup, CompanySetupCreate, ChartOfAccount, SisterCompany, SisterCompanyCreate, ConsolidatedAccount,
+    _new_id, ACCESS_TOKEN_EXPIRES,
+    get_default_permissions, ensure_super_admin, ensure_auth_indexes
 )
 from email_service import send_password_reset_email, send_welcome_email
 from accounting_systems import (
-    get_accounting_system, get_chart_of_accounts, get_currency_info, 
-    get_country_info, get_available_countries, get_available_currencies
+    get_accounting_system, get_currency_info, 
+    get_country_info, get_chart_of_accounts_columns,
+    get_available_countries_bytes, get_available_currencies_bytes
 )
 from currency_service import (
     CurrencyService, ExchangeRate, CurrencyRateUpdate, 
-    get_currency_service, format_currency_amount
+    get_currency_service, format_currency_amount, close_http_session
 )
-from tenant_service import get_tenant_service, TenantService
+from tenant_service import get_tenant_service, TenantService, mongo_client_options
 from tenant_middleware import get_tenant_middleware
 
 ROOT_DIR = Path(__file__).parent
@@ -41,14 +46,19 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(mongo_url, **mongo_client_options())
 db = client[os.environ['DB_NAME']]
 
+# Activity logs can afford to lose the last few writes on a crash, so inserts skip majority/journal acknowledgement
+_LOG_WRITE_CONCERN = WriteConcern(w=1, j=False)
+call_logs_writer = db.get_collection("call_logs", write_concern=_LOG_WRITE_CONCERN)
+email_responses_writer = db.get_collection("email_responses", write_concern=_LOG_WRITE_CONCERN)
+
 # Set database for auth module
 set_database(db)
 
-# Create the main app without a prefix
-app = FastAPI()
+# Create the main app without a prefix; responses are encoded with orjson rather than stdlib json
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Add global exception handler for validation errors
 @app.exception_handler(RequestValidationError)
@@ -100,7 +110,7 @@ class ForgotPasswordRequest(BaseModel):
     email: str
 
 class Contact(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     user_id: str  # Add user_id for data isolation
     name: str
     email: str
@@ -143,7 +153,7 @@ class ContactUpdate(BaseModel):
     notes: Optional[str] = None
 
 class Company(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     user_id: str  # Add user_id for data isolation
     name: str
     industry: Optional[str] = None
@@ -165,7 +175,7 @@ class CompanyCreate(BaseModel):
     description: Optional[str] = None
 
 class CallLog(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     user_id: str  # Add user_id for data isolation
     contact_id: str
     contact_name: str
@@ -188,7 +198,7 @@ class CallLogCreate(BaseModel):
     follow_up_date: Optional[datetime] = None
 
 class EmailResponse(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=_new_id)
     user_id: str  # Add user_id for data isolation
     contact_id: str
     contact_name: str
@@ -210,6 +220,22 @@ class EmailResponseCreate(BaseModel):
     response_type: Optional[str] = None
     notes: Optional[str] = None
 
+class ContactPage(BaseModel):
+    items: List[Contact]
+    total: int
+
+class ContactDetail(BaseModel):
+    contact: Contact
+    call_logs: List[CallLog]
+    email_responses: List[EmailResponse]
+
+# List adapters validate a whole result set in one pydantic-core call
+_CONTACT_LIST = TypeAdapter(List[Contact])
+_COMPANY_LIST = TypeAdapter(List[Company])
+_CALLLOG_LIST = TypeAdapter(List[CallLog])
+_EMAIL_LIST = TypeAdapter(List[EmailResponse])
+_USER_LIST = TypeAdapter(List[User])
+
 # Company Management Models
 class CompanyUpdate(BaseModel):
     company_name: Optional[str] = None
@@ -253,31 +279,22 @@ class ExportRequest(BaseModel):
     filters: Optional[Dict[str, Any]] = None
 
 # Helper functions
-def prepare_for_mongo(data):
-    """Convert datetime objects to ISO strings for MongoDB storage"""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-            elif isinstance(value, dict):
-                data[key] = prepare_for_mongo(value)
-    return data
-
-def parse_from_mongo(item):
-    """Convert ISO strings back to datetime objects and remove MongoDB ObjectIds"""
-    if isinstance(item, dict):
-        # Remove MongoDB ObjectId field
-        if '_id' in item:
-            del item['_id']
-        
-        # Convert datetime strings back to datetime objects
-        for key, value in item.items():
-            if key in ['created_at', 'updated_at', 'date', 'follow_up_date'] and isinstance(value, str):
-                try:
-                    item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except ValueError:
-                    pass  # Keep original value if parsing fails
-    return item
+# Readers that return raw documents drop the ObjectId server-side
+_NO_OBJECT_ID = {"_id": 0}
+
+def build_chart_of_accounts(company_id: str, chart_system: str) -> List[Dict[str, Any]]:
+    """Build the Mongo documents for a company's chart of accounts from a template"""
+    codes, names, types, categories = get_chart_of_accounts_columns(chart_system)
+    return [
+        ChartOfAccount(
+            company_id=company_id,
+            code=code,
+            name=name,
+            account_type=account_type,
+            category=category
+        ).model_dump()
+        for code, name, account_type, category in zip(codes, names, types, categories)
+    ]
 
 # Helper function to get data filter based on user role
 def get_user_filter(current_user: UserInDB):
@@ -287,6 +304,30 @@ def get_user_filter(current_user: UserInDB):
     else:
         return {"user_id": current_user.id}  # Regular user sees only their data
 
+# (collection, keys, options) for the CRM collections; list endpoints filter by user_id and sort by date,
+# detail endpoints look up by id (admins query without a user_id, so id is indexed on its own).
+# Company setups and charts of accounts are read from here when a user has no tenant database
+_CRM_INDEXES = (
+    ("contacts", [("id", 1)], {"unique": True}),
+    ("contacts", [("user_id", 1), ("created_at", -1)], {}),
+    ("companies", [("id", 1)], {"unique": True}),
+    ("companies", [("user_id", 1)], {}),
+    ("company_setups", [("user_id", 1)], {}),
+    ("chart_of_accounts", [("company_id", 1), ("account_code", 1)], {}),
+    ("call_logs", [("user_id", 1), ("contact_id", 1), ("date", -1)], {}),
+    ("call_logs", [("user_id", 1), ("date", -1)], {}),
+    ("email_responses", [("user_id", 1), ("contact_id", 1), ("date", -1)], {}),
+    ("email_responses", [("user_id", 1), ("date", -1)], {}),
+)
+
+async def ensure_crm_indexes(database):
+    """Create the indexes behind the CRM endpoints and the main-database company setup lookups"""
+    for collection, keys, options in _CRM_INDEXES:
+        try:
+            await database[collection].create_index(keys, **options)
+        except Exception as e:
+            print(f"ERROR: Failed to create {collection} index {keys}: {e}")
+
 # Authentication Routes
 @api_router.post("/auth/register", response_model=Token)
 async def register(user_data: UserCreate, current_user: UserInDB = Depends(get_admin_user)):
@@ -297,42 +338,31 @@ async def register(user_data: UserCreate, current_user: UserInDB = Depends(get_a
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
-    user = {
-        "id": str(uuid.uuid4()),
-        "email": user_data.email,
-        "hashed_password": hashed_password,
-        "name": user_data.name,
-        "company": user_data.company,
-        "role": user_data.role,
-        "is_active": True,
-        "created_at": datetime.now(timezone.utc)
-    }
+    hashed_password = await hash_password_async(user_data.password)
+    user_in_db = UserInDB(
+        id=_new_id(),
+        email=user_data.email,
+        hashed_password=hashed_password,
+        name=user_data.name,
+        company=user_data.company,
+        role=user_data.role,
+        is_active=True,
+        created_at=datetime.now(timezone.utc),
+    )
     
-    prepared_user = prepare_user_for_mongo(user)
-    await db.users.insert_one(prepared_user)
+    await db.users.insert_one(user_in_db.model_dump())
     
     # Create access token
-    access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data={"sub": user_in_db.email}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
     
-    user_response = User(
-        id=user["id"],
-        email=user["email"],
-        name=user["name"],
-        company=user["company"],
-        role=user["role"],
-        is_active=user["is_active"],
-        onboarding_completed=user["onboarding_completed"],
-        created_at=user["created_at"]
-    )
+    user_response = User.model_validate(user_in_db.model_dump(exclude={"hashed_password"}))
     
     return Token(access_token=access_token, token_type="bearer", user=user_response)
 
 @api_router.post("/auth/signup", response_model=Token)
-async def public_signup(user_data: UserSignup):
+async def public_signup(user_data: UserSignup, background_tasks: BackgroundTasks):
     """Public signup endpoint for new users"""
     # Check if user already exists
     existing_user = await db.users.find_one({"email": user_data.email})
@@ -340,56 +370,38 @@ async def public_signup(user_data: UserSignup):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user with 'admin' role by default
-    hashed_password = hash_password(user_data.password)
-    user = {
-        "id": str(uuid.uuid4()),
-        "email": user_data.email,
-        "hashed_password": hashed_password,
-        "name": user_data.name,
-        "company": user_data.company,
-        "role": "admin",  # New users are admin by default
-        "is_active": True,
-        "onboarding_completed": False,  # Require company setup
-        "created_at": datetime.now(timezone.utc)
-    }
-    
-    prepared_user = prepare_user_for_mongo(user)
-    await db.users.insert_one(prepared_user)
+    hashed_password = await hash_password_async(user_data.password)
+    user_in_db = UserInDB(
+        id=_new_id(),
+        email=user_data.email,
+        hashed_password=hashed_password,
+        name=user_data.name,
+        company=user_data.company,
+        role="admin",  # New users are admin by default
+        is_active=True,
+        onboarding_completed=False,  # Require company setup
+        created_at=datetime.now(timezone.utc),
+    )
     
-    # Send welcome email
-    try:
-        base_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
-        email_sent = await send_welcome_email(
-            email=user["email"],
-            user_name=user["name"],
-            user_company=user["company"],
-            user_role=user["role"],
-            base_url=base_url
-        )
-        if email_sent:
-            print(f"✅ Welcome email sent to {user['email']}")
-        else:
-            print(f"❌ Failed to send welcome email to {user['email']}")
-    except Exception as e:
-        print(f"❌ Error sending welcome email: {str(e)}")
-        # Don't fail signup if email fails
+    await db.users.insert_one(user_in_db.model_dump())
+    
+    # Send welcome email after the response; SMTP latency or failure never holds up signup
+    base_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
+    background_tasks.add_task(
+        send_welcome_email,
+        email=user_in_db.email,
+        user_name=user_in_db.name,
+        user_company=user_in_db.company,
+        user_role=user_in_db.role,
+        base_url=base_url
+    )
     
     # Create access token
-    access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data={"sub": user_in_db.email}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
     
-    user_response = User(
-        id=user["id"],
-        email=user["email"],
-        name=user["name"],
-        company=user["company"],
-        role=user["role"],
-        is_active=user["is_active"],
-        onboarding_completed=user["onboarding_completed"],
-        created_at=user["created_at"]
-    )
+    user_response = User.model_validate(user_in_db.model_dump(exclude={"hashed_password"}))
     
     return Token(access_token=access_token, token_type="bearer", user=user_response)
 
@@ -404,26 +416,16 @@ async def login(user_credentials: UserLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
     
-    user_response = User(
-        id=user.id,
-        email=user.email,
-        name=user.name,
-        company=user.company,
-        role=user.role,
-        is_active=user.is_active,
-        onboarding_completed=user.onboarding_completed,
-        created_at=user.created_at
-    )
+    user_response = User.model_validate(user.model_dump(exclude={"hashed_password"}))
     
     return Token(access_token=access_token, token_type="bearer", user=user_response)
 
 @api_router.post("/auth/forgot-password")
-async def forgot_password(request: ForgotPasswordRequest):
+async def forgot_password(request: ForgotPasswordRequest, background_tasks: BackgroundTasks):
     """Forgot password endpoint - sends reset instructions via email"""
     try:
         # Check if user exists
@@ -435,18 +437,14 @@ async def forgot_password(request: ForgotPasswordRequest):
             # Get base URL for reset link (you might want to make this configurable)
             base_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
             
-            # Send reset email
-            email_sent = await send_password_reset_email(
+            # Send reset email after the response; the send functions log their own outcome
+            background_tasks.add_task(
+                send_password_reset_email,
                 email=request.email,
                 user_name=user["name"],
                 reset_token=reset_token,
                 base_url=base_url
             )
-            
-            if email_sent:
-                print(f"✅ Password reset email sent to {request.email}")
-            else:
-                print(f"❌ Failed to send password reset email to {request.email}")
         
         # Always return success message for security (don't reveal if email exists)
         return {"message": "If the email exists, password reset instructions have been sent"}
@@ -476,12 +474,12 @@ async def reset_password(password_reset: PasswordReset):
             )
         
         # Update the password
-        new_hashed_password = hash_password(password_reset.new_password)
+        new_hashed_password = await hash_password_async(password_reset.new_password)
         await db.users.update_one(
             {"id": reset_token["user_id"]},
             {"$set": {
                 "hashed_password": new_hashed_password,
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "updated_at": datetime.now(timezone.utc)
             }}
         )
         
@@ -533,8 +531,9 @@ async def get_current_user_info(current_user: UserInDB = Depends(get_current_act
 @api_router.get("/admin/users", response_model=List[User])
 async def get_all_users(current_user: UserInDB = Depends(get_admin_user)):
     """Admin-only endpoint to get all users"""
-    users = await db.users.find().to_list(length=None)
-    return [User(**parse_user_from_mongo(user)) for user in users]
+    cursor = db.users.find({}, {"_id": 0, "hashed_password": 0}).batch_size(1000)
+    users = await cursor.to_list(length=None)
+    return _USER_LIST.validate_python(users)
 
 @api_router.delete("/admin/users/{user_id}")
 async def delete_user(user_id: str, current_user: UserInDB = Depends(get_admin_user)):
@@ -548,12 +547,12 @@ async def delete_user(user_id: str, current_user: UserInDB = Depends(get_admin_u
 @api_router.get("/setup/countries")
 async def get_countries():
     """Get available countries with accounting systems"""
-    return get_available_countries()
+    return Response(content=get_available_countries_bytes(), media_type="application/json")
 
 @api_router.get("/setup/currencies") 
 async def get_currencies():
     """Get available currencies"""
-    return get_available_currencies()
+    return Response(content=get_available_currencies_bytes(), media_type="application/json")
 
 @api_router.get("/setup/accounting-system/{country_code}")
 async def get_country_accounting_system(country_code: str):
@@ -615,31 +614,18 @@ async def setup_company(
     
     # Save company setup to tenant database
     print(f"DEBUG: Saving main company setup: {company_setup.company_name} (ID: {company_setup.id})")
-    prepared_company = prepare_for_mongo(company_setup.dict())
+    prepared_company = company_setup.model_dump()
     print(f"DEBUG: Prepared company data for MongoDB: {prepared_company.get('company_name')}")
     company_insert_result = await tenant_db.company_setups.insert_one(prepared_company)
     print(f"DEBUG: Main company saved with MongoDB ID: {company_insert_result.inserted_id}")
     
     # Also save user to tenant database
     print(f"DEBUG: Saving user to tenant database: {current_user.email}")
-    prepared_user = prepare_user_for_mongo(current_user.dict())
-    user_insert_result = await tenant_db.users.insert_one(prepared_user)
+    user_insert_result = await tenant_db.users.insert_one(current_user.model_dump(mode="python"))
     print(f"DEBUG: User saved with MongoDB ID: {user_insert_result.inserted_id}")
     
     # Create chart of accounts based on accounting system in tenant database
-    chart_template = get_chart_of_accounts(accounting_system["chart_of_accounts"])
-    accounts_to_create = []
-    
-    for category, accounts in chart_template.items():
-        for account in accounts:
-            chart_account = ChartOfAccount(
-                company_id=company_setup.id,
-                code=account["code"],
-                name=account["name"],
-                account_type=account["type"],
-                category=account["category"]
-            )
-            accounts_to_create.append(prepare_for_mongo(chart_account.dict()))
+    accounts_to_create = build_chart_of_accounts(company_setup.id, accounting_system["chart_of_accounts"])
     
     if accounts_to_create:
         await tenant_db.chart_of_accounts.insert_many(accounts_to_create)
@@ -679,21 +665,11 @@ async def setup_company(
             )
             
             print(f"DEBUG: Created sister company object with ID: {sister_company.id}")
-            prepared_sister = prepare_for_mongo(sister_company.dict())
+            prepared_sister = sister_company.model_dump()
             sister_companies_to_create.append(prepared_sister)
             
             # Create chart of accounts for sister company
-            sister_accounts_to_create = []
-            for category, accounts in chart_template.items():
-                for account in accounts:
-                    sister_chart_account = ChartOfAccount(
-                        company_id=sister_company.id,
-                        code=account["code"],
-                        name=account["name"],
-                        account_type=account["type"],
-                        category=account["category"]
-                    )
-                    sister_accounts_to_create.append(prepare_for_mongo(sister_chart_account.dict()))
+            sister_accounts_to_create = build_chart_of_accounts(sister_company.id, accounting_system["chart_of_accounts"])
             
             # Save sister company chart of accounts
             if sister_accounts_to_create:
@@ -709,15 +685,13 @@ async def setup_company(
         print(f"DEBUG: No sister companies to process. Business type: {company_data.business_type}, Sister companies count: {len(company_data.sister_companies) if company_data.sister_companies else 0}")
     
     # Update user onboarding status and make them admin for their company
-    from auth import get_default_permissions
-    
     update_data = {
         "onboarding_completed": True,
         "company_id": company_setup.id,  # Link user to company
         "role": "admin",  # Company creators become admins by default
         "permissions": get_default_permissions("admin"),
         "assigned_companies": [company_setup.id],  # Add company to their assigned companies list
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "updated_at": datetime.now(timezone.utc)
     }
     
     print(f"DEBUG: Updating user {current_user.email} with company_id: {company_setup.id}")
@@ -773,7 +747,7 @@ async def get_company_setup(current_user: UserInDB = Depends(get_current_active_
     
     if not company_setup:
         raise HTTPException(status_code=404, detail="Company setup not found")
-    return CompanySetup(**parse_from_mongo(company_setup))
+    return CompanySetup(**company_setup)
 
 @api_router.get("/setup/chart-of-accounts")
 async def get_user_chart_of_accounts(current_user: UserInDB = Depends(get_current_active_user)):
@@ -794,7 +768,7 @@ async def get_user_chart_of_accounts(current_user: UserInDB = Depends(get_curren
         {"company_id": company_setup["id"], "is_active": True}
     ).to_list(length=None)
     
-    return [ChartOfAccount(**parse_from_mongo(account)) for account in accounts]
+    return [ChartOfAccount(**account) for account in accounts]
 
 # Currency Management Routes
 @api_router.get("/currency/rates", response_model=List[ExchangeRate])
@@ -966,29 +940,16 @@ async def add_sister_company(
     # Create sister company
     sister_company_data = SisterCompany(
         group_company_id=company_setup["id"],
-        **sister_company.dict()
+        **sister_company.model_dump()
     )
     
     # Save to database
-    prepared_company = prepare_for_mongo(sister_company_data.dict())
+    prepared_company = sister_company_data.model_dump()
     await db_to_use.sister_companies.insert_one(prepared_company)
     
     # Create chart of accounts for sister company
-    from accounting_systems import get_accounting_system, get_chart_of_accounts
     accounting_system = get_accounting_system(sister_company.country_code)
-    chart_template = get_chart_of_accounts(accounting_system["chart_of_accounts"])
-    
-    accounts_to_create = []
-    for category, accounts in chart_template.items():
-        for account in accounts:
-            chart_account = ChartOfAccount(
-                company_id=sister_company_data.id,
-                code=account["code"],
-                name=account["name"],
-                account_type=account["type"],
-                category=account["category"]
-            )
-            accounts_to_create.append(prepare_for_mongo(chart_account.dict()))
+    accounts_to_create = build_chart_of_accounts(sister_company_data.id, accounting_system["chart_of_accounts"])
     
     if accounts_to_create:
         await db_to_use.chart_of_accounts.insert_many(accounts_to_create)
@@ -1017,7 +978,7 @@ async def get_sister_companies(current_user: UserInDB = Depends(get_current_acti
         "is_active": True
     }).to_list(length=None)
     
-    return [SisterCompany(**parse_from_mongo(company)) for company in sister_companies]
+    return [SisterCompany(**company) for company in sister_companies]
 
 @api_router.delete("/company/sister-companies/{sister_company_id}")
 async def delete_sister_company(
@@ -1051,7 +1012,7 @@ async def delete_sister_company(
     # Soft delete
     await db_to_use.sister_companies.update_one(
         {"id": sister_company_id},
-        {"$set": {"is_active": False, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"is_active": False, "updated_at": datetime.now(timezone.utc)}}
     )
     
     return {"message": "Sister company deleted successfully"}
@@ -1300,8 +1261,7 @@ async def add_account_to_company(
             raise HTTPException(status_code=403, detail="Access denied to this company")
     
     # Create new account
-    from uuid import uuid4
-    account_id = str(uuid4())
+    account_id = _new_id()
     
     new_account = {
         "id": account_id,
@@ -1314,7 +1274,7 @@ async def add_account_to_company(
         "current_balance": account_data.get("opening_balance", 0.0),
         "balance": account_data.get("opening_balance", 0.0),  # Add balance field for compatibility
         "is_active": True,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
         "created_by": current_user.id
     }
     
@@ -1328,7 +1288,8 @@ async def add_account_to_company(
     if existing_account:
         raise HTTPException(status_code=400, detail=f"Account code {account_data.get('code')} already exists")
     
-    await db_to_use.chart_of_accounts.insert_one(prepare_for_mongo(new_account))
+    # Insert a copy so the ObjectId insert_one adds doesn't end up in the response
+    await db_to_use.chart_of_accounts.insert_one(dict(new_account))
     
     return {"success": True, "account": new_account}
 
@@ -1374,7 +1335,7 @@ async def update_account_opening_balance(
             "$set": {
                 "opening_balance": opening_balance,
                 "current_balance": opening_balance,  # Reset current balance to opening balance
-                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "updated_at": datetime.now(timezone.utc),
                 "updated_by": current_user.id
             }
         }
@@ -1510,7 +1471,7 @@ async def update_user_permissions(
         {"id": user_id},
         {"$set": {
             "permissions": clean_permissions,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
     
@@ -1545,7 +1506,7 @@ async def update_user_role(
     
     result = await db_to_use.users.update_one(
         {"id": user_id},
-        {"$set": {"role": new_role, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"role": new_role, "updated_at": datetime.now(timezone.utc)}}
     )
     
     if result.matched_count == 0:
@@ -1640,53 +1601,98 @@ async def update_additional_currencies(
     return {"success": True, "message": "Additional currencies updated successfully"}
 
 # Dashboard and Analytics
+
+# Polled dashboard responses: cache key -> (expiry monotonic time, stats). Admins share the
+# unfiltered "__all__" entry; CRM writes drop the writer's entry and the admin one
+DASHBOARD_CACHE_TTL_SECONDS = 15
+DASHBOARD_CACHE_MAX_SIZE = 1024
+_ADMIN_DASHBOARD_KEY = "__all__"
+_dashboard_cache: Dict[str, tuple] = {}
+
+def _dashboard_cache_key(current_user: UserInDB) -> str:
+    # Mirrors get_user_filter: admins see every user's data
+    return _ADMIN_DASHBOARD_KEY if current_user.role == "admin" else current_user.id
+
+def invalidate_dashboard_cache(current_user: UserInDB):
+    _dashboard_cache.pop(current_user.id, None)
+    _dashboard_cache.pop(_ADMIN_DASHBOARD_KEY, None)
+
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(current_user: UserInDB = Depends(get_current_active_user)):
     """Get key statistics for the dashboard"""
+    cache_key = _dashboard_cache_key(current_user)
+    cached = _dashboard_cache.get(cache_key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    
     # Get user filter
     user_filter = get_user_filter(current_user)
     
-    # Count totals
-    total_contacts = await db.contacts.count_documents(user_filter)
-    total_companies = await db.companies.count_documents(user_filter)
-    total_calls = await db.call_logs.count_documents(user_filter)
-    total_emails = await db.email_responses.count_documents(user_filter)
+    thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
     
-    # Contact status distribution
+    # One $facet aggregation per collection returns its total and breakdowns in a single round-trip
     contact_pipeline = [
         {"$match": user_filter},
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            # Contact status distribution
+            "status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            # Recent activity (contacts added per day for last 30 days)
+            "activity": [
+                {"$match": {"created_at": {"$gte": thirty_days_ago}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id": 1}}
+            ]
+        }}
     ]
-    contact_status_data = await db.contacts.aggregate(contact_pipeline).to_list(length=None)
     
     # Call disposition distribution
     call_pipeline = [
         {"$match": user_filter},
-        {"$group": {"_id": "$disposition", "count": {"$sum": 1}}}
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "disposition": [{"$group": {"_id": "$disposition", "count": {"$sum": 1}}}]
+        }}
     ]
-    call_disposition_data = await db.call_logs.aggregate(call_pipeline).to_list(length=None)
     
     # Email status distribution
     email_pipeline = [
         {"$match": user_filter},
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        }}
     ]
-    email_status_data = await db.email_responses.aggregate(email_pipeline).to_list(length=None)
     
-    # Recent activity (contacts added per day for last 30 days)
-    from datetime import timedelta
-    thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-    activity_pipeline = [
-        {"$match": {**user_filter, "created_at": {"$gte": thirty_days_ago.isoformat()}}},
-        {"$group": {
-            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$dateFromString": {"dateString": "$created_at"}}}},
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"_id": 1}}
-    ]
-    activity_data = await db.contacts.aggregate(activity_pipeline).to_list(length=None)
+    async def first_facet(collection, pipeline):
+        # $facet always emits exactly one document
+        cursor = await collection.aggregate(pipeline)
+        return (await cursor.to_list(length=1))[0]
+    
+    # The collections are independent, so query them concurrently over the connection pool
+    contact_facets, call_facets, email_facets, total_companies = await asyncio.gather(
+        first_facet(db.contacts, contact_pipeline),
+        first_facet(db.call_logs, call_pipeline),
+        first_facet(db.email_responses, email_pipeline),
+        db.companies.count_documents(user_filter)
+    )
     
-    return {
+    def facet_total(facets):
+        # $count emits no document for an empty match
+        return facets["total"][0]["n"] if facets["total"] else 0
+    
+    total_contacts = facet_total(contact_facets)
+    total_calls = facet_total(call_facets)
+    total_emails = facet_total(email_facets)
+    contact_status_data = contact_facets["status"]
+    call_disposition_data = call_facets["disposition"]
+    email_status_data = email_facets["status"]
+    activity_data = contact_facets["activity"]
+    
+    stats = {
         "totals": {
             "contacts": total_contacts,
             "companies": total_companies,
@@ -1698,22 +1704,62 @@ async def get_dashboard_stats(current_user: UserInDB = Depends(get_current_activ
         "email_status": email_status_data,
         "activity_trend": activity_data
     }
+    
+    if len(_dashboard_cache) >= DASHBOARD_CACHE_MAX_SIZE:
+        _dashboard_cache.clear()
+    _dashboard_cache[cache_key] = (time.monotonic() + DASHBOARD_CACHE_TTL_SECONDS, stats)
+    return stats
 
 # Contact Routes
 @api_router.post("/contacts", response_model=Contact)
 async def create_contact(contact: ContactCreate, current_user: UserInDB = Depends(get_current_active_user)):
-    contact_dict = contact.dict()
+    contact_dict = contact.model_dump()
     contact_dict['user_id'] = current_user.id  # Add user_id
     contact_obj = Contact(**contact_dict)
-    prepared_data = prepare_for_mongo(contact_obj.dict())
+    prepared_data = contact_obj.model_dump()
     await db.contacts.insert_one(prepared_data)
+    invalidate_dashboard_cache(current_user)
     return contact_obj
 
+@api_router.post("/contacts/bulk", response_model=List[Contact])
+async def create_contacts_bulk(contacts: List[ContactCreate], current_user: UserInDB = Depends(get_current_active_user)):
+    contact_objs = [Contact(**contact.model_dump(), user_id=current_user.id) for contact in contacts]
+    if contact_objs:
+        # Unordered: the server applies the batch in parallel and one bad row does not stop the rest
+        await db.contacts.insert_many([contact_obj.model_dump() for contact_obj in contact_objs], ordered=False)
+        invalidate_dashboard_cache(current_user)
+    return contact_objs
+
 @api_router.get("/contacts", response_model=List[Contact])
 async def get_contacts(current_user: UserInDB = Depends(get_current_active_user), skip: int = 0, limit: int = 100):
     user_filter = get_user_filter(current_user)
-    contacts = await db.contacts.find(user_filter).skip(skip).limit(limit).to_list(length=None)
-    return [Contact(**parse_from_mongo(contact)) for contact in contacts]
+    contacts = await db.contacts.find(user_filter, _NO_OBJECT_ID).skip(skip).limit(limit).to_list(length=None)
+    return _CONTACT_LIST.validate_python(contacts)
+
+# Registered before /contacts/{contact_id} so "page" is not taken as an id
+@api_router.get("/contacts/page", response_model=ContactPage)
+async def get_contacts_page(
+    current_user: UserInDB = Depends(get_current_active_user),
+    # $skip rejects negatives and $limit needs a positive value; bound them here so bad input is a 422, not a 500
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """A page of contacts, newest first, together with the total count in one round trip"""
+    user_filter = get_user_filter(current_user)
+    pipeline = [
+        {"$match": user_filter},
+        {"$facet": {
+            "rows": [{"$sort": {"created_at": -1}}, {"$skip": skip}, {"$limit": limit}, {"$project": {"_id": 0}}],
+            "total": [{"$count": "n"}]
+        }}
+    ]
+    cursor = await db.contacts.aggregate(pipeline)
+    page = (await cursor.to_list(length=1))[0]
+    return ContactPage(
+        items=_CONTACT_LIST.validate_python(page["rows"]),
+        # $count emits no document for an empty match
+        total=page["total"][0]["n"] if page["total"] else 0
+    )
 
 @api_router.get("/contacts/{contact_id}", response_model=Contact)
 async def get_contact(contact_id: str, current_user: UserInDB = Depends(get_current_active_user)):
@@ -1721,25 +1767,66 @@ async def get_contact(contact_id: str, current_user: UserInDB = Depends(get_curr
     contact = await db.contacts.find_one({**user_filter, "id": contact_id})
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    return Contact(**parse_from_mongo(contact))
+    return Contact(**contact)
+
+# Latest activity embedded in the contact detail view
+CONTACT_DETAIL_ACTIVITY_LIMIT = 50
+
+@api_router.get("/contacts/{contact_id}/full", response_model=ContactDetail)
+async def get_contact_full(contact_id: str, current_user: UserInDB = Depends(get_current_active_user)):
+    """Contact with its latest call logs and email responses, joined server-side in one round trip"""
+    user_filter = get_user_filter(current_user)
+    
+    def activity_lookup(collection, as_field):
+        return {"$lookup": {
+            "from": collection,
+            "localField": "id",
+            "foreignField": "contact_id",
+            "as": as_field,
+            "pipeline": [
+                {"$match": user_filter},
+                {"$sort": {"date": -1}},
+                {"$limit": CONTACT_DETAIL_ACTIVITY_LIMIT},
+                {"$project": {"_id": 0}}
+            ]
+        }}
+    
+    pipeline = [
+        {"$match": {**user_filter, "id": contact_id}},
+        {"$limit": 1},
+        {"$project": {"_id": 0}},
+        activity_lookup("call_logs", "call_logs"),
+        activity_lookup("email_responses", "email_responses")
+    ]
+    cursor = await db.contacts.aggregate(pipeline)
+    docs = await cursor.to_list(length=1)
+    if not docs:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    
+    contact = docs[0]
+    call_logs = contact.pop("call_logs")
+    email_responses = contact.pop("email_responses")
+    return ContactDetail(contact=contact, call_logs=call_logs, email_responses=email_responses)
 
 @api_router.put("/contacts/{contact_id}", response_model=Contact)
 async def update_contact(contact_id: str, contact_update: ContactUpdate, current_user: UserInDB = Depends(get_current_active_user)):
     user_filter = get_user_filter(current_user)
-    update_data = {k: v for k, v in contact_update.dict().items() if v is not None}
+    update_data = contact_update.model_dump(exclude_unset=True, exclude_none=True)
     update_data['updated_at'] = datetime.now(timezone.utc)
-    prepared_data = prepare_for_mongo(update_data)
     
-    result = await db.contacts.update_one(
+    # One round trip: update and read back the new document atomically
+    updated_contact = await db.contacts.find_one_and_update(
         {**user_filter, "id": contact_id}, 
-        {"$set": prepared_data}
+        {"$set": update_data},
+        projection=_NO_OBJECT_ID,
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if updated_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     
-    updated_contact = await db.contacts.find_one({**user_filter, "id": contact_id})
-    return Contact(**parse_from_mongo(updated_contact))
+    invalidate_dashboard_cache(current_user)
+    return Contact(**updated_contact)
 
 @api_router.delete("/contacts/{contact_id}")
 async def delete_contact(contact_id: str, current_user: UserInDB = Depends(get_current_active_user)):
@@ -1747,16 +1834,18 @@ async def delete_contact(contact_id: str, current_user: UserInDB = Depends(get_c
     result = await db.contacts.delete_one({**user_filter, "id": contact_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Contact not found")
+    invalidate_dashboard_cache(current_user)
     return {"message": "Contact deleted successfully"}
 
 # Company Routes
 @api_router.post("/companies", response_model=Company)
 async def create_company(company: CompanyCreate, current_user: UserInDB = Depends(get_current_active_user)):
-    company_dict = company.dict()
+    company_dict = company.model_dump()
     company_dict['user_id'] = current_user.id  # Add user_id
     company_obj = Company(**company_dict)
-    prepared_data = prepare_for_mongo(company_obj.dict())
+    prepared_data = company_obj.model_dump()
     await db.companies.insert_one(prepared_data)
+    invalidate_dashboard_cache(current_user)
     return company_obj
 
 # =================================================================================
@@ -1785,7 +1874,7 @@ async def convert_to_group_company(current_user: UserInDB = Depends(get_current_
         # Update business type to Group Company
         await db_to_use.company_setups.update_one(
             {"user_id": current_user.id},
-            {"$set": {"business_type": "Group Company", "updated_at": datetime.now(timezone.utc).isoformat()}}
+            {"$set": {"business_type": "Group Company", "updated_at": datetime.now(timezone.utc)}}
         )
         
         print(f"DEBUG: Converted company {company_setup_raw.get('company_name')} to Group Company")
@@ -1838,7 +1927,7 @@ async def get_all_companies(current_user: UserInDB = Depends(get_current_active_
         print(f"DEBUG: Using database: {db_to_use.name}")
         
         # Get main companies
-        main_companies_raw = await db_to_use.company_setups.find().to_list(length=None)
+        main_companies_raw = await db_to_use.company_setups.find({}, _NO_OBJECT_ID).to_list(length=None)
         print(f"DEBUG: Found {len(main_companies_raw)} main companies")
         
         result = []
@@ -1846,7 +1935,7 @@ async def get_all_companies(current_user: UserInDB = Depends(get_current_active_
         # Add main companies
         for company_raw in main_companies_raw:
             try:
-                company = parse_from_mongo(company_raw)
+                company = company_raw
                 # Add a flag to indicate this is a main company
                 company['is_main_company'] = True
                 company['parent_company_id'] = None
@@ -1857,12 +1946,12 @@ async def get_all_companies(current_user: UserInDB = Depends(get_current_active_
         
         # Get sister companies and add them to the list
         try:
-            sister_companies_raw = await db_to_use.sister_companies.find({"is_active": True}).to_list(length=None)
+            sister_companies_raw = await db_to_use.sister_companies.find({"is_active": True}, _NO_OBJECT_ID).to_list(length=None)
             print(f"DEBUG: Found {len(sister_companies_raw)} sister companies")
             
             for sister_raw in sister_companies_raw:
                 try:
-                    sister = parse_from_mongo(sister_raw)
+                    sister = sister_raw
                     # Transform sister company data to match CompanySetup structure
                     sister_company = {
                         'id': sister.get('id'),
@@ -1910,7 +1999,7 @@ async def get_company_details(company_id: str, current_user: UserInDB = Depends(
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    return CompanySetup(**parse_from_mongo(company))
+    return CompanySetup(**company)
 
 @api_router.put("/companies/management/{company_id}")
 async def update_company(
@@ -1929,8 +2018,8 @@ async def update_company(
         db_to_use = tenant_db
     
     # Only update fields that are provided
-    update_data = {k: v for k, v in company_data.dict().items() if v is not None}
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_data = company_data.model_dump(exclude_unset=True, exclude_none=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     
     result = await db_to_use.company_setups.update_one(
         {"id": company_id},
@@ -1977,8 +2066,8 @@ async def delete_company(company_id: str, current_user: UserInDB = Depends(get_c
 @api_router.get("/companies", response_model=List[Company])
 async def get_companies(current_user: UserInDB = Depends(get_current_active_user), skip: int = 0, limit: int = 100):
     user_filter = get_user_filter(current_user)
-    companies = await db.companies.find(user_filter).skip(skip).limit(limit).to_list(length=None)
-    return [Company(**parse_from_mongo(company)) for company in companies]
+    companies = await db.companies.find(user_filter, _NO_OBJECT_ID).skip(skip).limit(limit).to_list(length=None)
+    return _COMPANY_LIST.validate_python(companies)
 
 @api_router.get("/companies/{company_id}", response_model=Company)
 async def get_company(company_id: str, current_user: UserInDB = Depends(get_current_active_user)):
@@ -1986,51 +2075,53 @@ async def get_company(company_id: str, current_user: UserInDB = Depends(get_curr
     company = await db.companies.find_one({**user_filter, "id": company_id})
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-    return Company(**parse_from_mongo(company))
+    return Company(**company)
 
 # Call Log Routes
 @api_router.post("/call-logs", response_model=CallLog)
 async def create_call_log(call_log: CallLogCreate, current_user: UserInDB = Depends(get_current_active_user)):
-    call_dict = call_log.dict()
+    call_dict = call_log.model_dump()
     call_dict['user_id'] = current_user.id  # Add user_id
     call_obj = CallLog(**call_dict)
-    prepared_data = prepare_for_mongo(call_obj.dict())
-    await db.call_logs.insert_one(prepared_data)
+    prepared_data = call_obj.model_dump()
+    await call_logs_writer.insert_one(prepared_data)
+    invalidate_dashboard_cache(current_user)
     return call_obj
 
 @api_router.get("/call-logs", response_model=List[CallLog])
 async def get_call_logs(current_user: UserInDB = Depends(get_current_active_user), skip: int = 0, limit: int = 100):
     user_filter = get_user_filter(current_user)
-    call_logs = await db.call_logs.find(user_filter).sort("date", -1).skip(skip).limit(limit).to_list(length=None)
-    return [CallLog(**parse_from_mongo(call_log)) for call_log in call_logs]
+    call_logs = await db.call_logs.find(user_filter, _NO_OBJECT_ID).sort("date", -1).skip(skip).limit(limit).to_list(length=None)
+    return _CALLLOG_LIST.validate_python(call_logs)
 
 @api_router.get("/call-logs/contact/{contact_id}", response_model=List[CallLog])
 async def get_contact_call_logs(contact_id: str, current_user: UserInDB = Depends(get_current_active_user)):
     user_filter = get_user_filter(current_user)
-    call_logs = await db.call_logs.find({**user_filter, "contact_id": contact_id}).sort("date", -1).to_list(length=None)
-    return [CallLog(**parse_from_mongo(call_log)) for call_log in call_logs]
+    call_logs = await db.call_logs.find({**user_filter, "contact_id": contact_id}, _NO_OBJECT_ID).sort("date", -1).to_list(length=None)
+    return _CALLLOG_LIST.validate_python(call_logs)
 
 # Email Response Routes
 @api_router.post("/email-responses", response_model=EmailResponse)
 async def create_email_response(email_response: EmailResponseCreate, current_user: UserInDB = Depends(get_current_active_user)):
-    email_dict = email_response.dict()
+    email_dict = email_response.model_dump()
     email_dict['user_id'] = current_user.id  # Add user_id
     email_obj = EmailResponse(**email_dict)
-    prepared_data = prepare_for_mongo(email_obj.dict())
-    await db.email_responses.insert_one(prepared_data)
+    prepared_data = email_obj.model_dump()
+    await email_responses_writer.insert_one(prepared_data)
+    invalidate_dashboard_cache(current_user)
     return email_obj
 
 @api_router.get("/email-responses", response_model=List[EmailResponse])
 async def get_email_responses(current_user: UserInDB = Depends(get_current_active_user), skip: int = 0, limit: int = 100):
     user_filter = get_user_filter(current_user)
-    email_responses = await db.email_responses.find(user_filter).sort("date", -1).skip(skip).limit(limit).to_list(length=None)
-    return [EmailResponse(**parse_from_mongo(email_response)) for email_response in email_responses]
+    email_responses = await db.email_responses.find(user_filter, _NO_OBJECT_ID).sort("date", -1).skip(skip).limit(limit).to_list(length=None)
+    return _EMAIL_LIST.validate_python(email_responses)
 
 @api_router.get("/email-responses/contact/{contact_id}", response_model=List[EmailResponse])
 async def get_contact_email_responses(contact_id: str, current_user: UserInDB = Depends(get_current_active_user)):
     user_filter = get_user_filter(current_user)
-    email_responses = await db.email_responses.find({**user_filter, "contact_id": contact_id}).sort("date", -1).to_list(length=None)
-    return [EmailResponse(**parse_from_mongo(email_response)) for email_response in email_responses]
+    email_responses = await db.email_responses.find({**user_filter, "contact_id": contact_id}, _NO_OBJECT_ID).sort("date", -1).to_list(length=None)
+    return _EMAIL_LIST.validate_python(email_responses)
 
 # Duplicate section removed - company management routes moved above generic company routes
 
@@ -2051,17 +2142,17 @@ async def get_enhanced_chart_of_accounts(company_id: str, current_user: UserInDB
         db_to_use = tenant_db
     
     # Get company information
-    company = await db_to_use.company_setups.find_one({"id": company_id})
+    company = await db_to_use.company_setups.find_one({"id": company_id}, _NO_OBJECT_ID)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
     # Get chart of accounts
-    accounts_raw = await db_to_use.chart_of_accounts.find({"company_id": company_id}).sort("account_code", 1).to_list(length=None)
+    accounts_raw = await db_to_use.chart_of_accounts.find({"company_id": company_id}, _NO_OBJECT_ID).sort("account_code", 1).to_list(length=None)
     
     # Parse accounts to remove MongoDB ObjectIds and map field names for frontend compatibility
     accounts = []
     for account_raw in accounts_raw:
-        account = parse_from_mongo(account_raw)
+        account = account_raw
         # Map backend field names to frontend expected names
         mapped_account = {
             **account,
@@ -2085,7 +2176,7 @@ async def get_enhanced_chart_of_accounts(company_id: str, current_user: UserInDB
         grouped_accounts[account_type][category].append(account)
     
     return {
-        "company_info": parse_from_mongo(company),
+        "company_info": company,
         "accounts": accounts,
         "grouped_accounts": grouped_accounts,
         "total_accounts": len(accounts),
@@ -2111,14 +2202,14 @@ async def get_enhanced_consolidated_accounts(current_user: UserInDB = Depends(ge
         db_to_use = tenant_db
     
     # Get main company
-    company_setup = await db_to_use.company_setups.find_one({"user_id": current_user.id})
+    company_setup = await db_to_use.company_setups.find_one({"user_id": current_user.id}, _NO_OBJECT_ID)
     if not company_setup:
         raise HTTPException(status_code=404, detail="Company setup not found")
     
     all_companies = []
     
     # Add main company
-    main_company = parse_from_mongo(company_setup)
+    main_company = company_setup
     main_company['is_main_company'] = True
     all_companies.append(main_company)
     
@@ -2127,10 +2218,10 @@ async def get_enhanced_consolidated_accounts(current_user: UserInDB = Depends(ge
         sister_companies_raw = await db_to_use.sister_companies.find({
             "group_company_id": company_setup["id"],
             "is_active": True
-        }).to_list(length=None)
+        }, _NO_OBJECT_ID).to_list(length=None)
         
         for sister_raw in sister_companies_raw:
-            sister = parse_from_mongo(sister_raw)
+            sister = sister_raw
             sister['is_main_company'] = False
             all_companies.append(sister)
     
@@ -2144,12 +2235,12 @@ async def get_enhanced_consolidated_accounts(current_user: UserInDB = Depends(ge
         company_name = company.get('company_name', 'Unknown')
         print(f"DEBUG: Processing accounts for company {company_name} (ID: {company_id})")
         
-        accounts_raw = await db_to_use.chart_of_accounts.find({"company_id": company_id}).sort("code", 1).to_list(length=None)
+        accounts_raw = await db_to_use.chart_of_accounts.find({"company_id": company_id}, _NO_OBJECT_ID).sort("code", 1).to_list(length=None)
         print(f"DEBUG: Found {len(accounts_raw)} accounts for {company_name}")
         
         # Parse accounts and map field names for frontend compatibility
         for account_raw in accounts_raw:
-            account = parse_from_mongo(account_raw)
+            account = account_raw
             # Map backend field names to frontend expected names
             mapped_account = {
                 **account,
@@ -2315,7 +2406,7 @@ async def create_account(
     
     # Create new account
     new_account = {
-        "id": str(uuid.uuid4()),
+        "id": _new_id(),
         "company_id": company_id,
         "account_name": account_data.account_name,
         "account_code": account_data.account_code,
@@ -2325,8 +2416,8 @@ async def create_account(
         "description": account_data.description,
         "opening_balance": account_data.opening_balance or 0.0,
         "current_balance": account_data.opening_balance or 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     
     await db_to_use.chart_of_accounts.insert_one(new_account)
@@ -2371,8 +2462,8 @@ async def update_account(
             raise HTTPException(status_code=400, detail="Account code already exists")
     
     # Update account
-    update_data = {k: v for k, v in account_data.dict().items() if v is not None}
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_data = account_data.model_dump(exclude_unset=True, exclude_none=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
     
     result = await db_to_use.chart_of_accounts.update_one(
         {"id": account_id, "company_id": company_id},
@@ -2447,15 +2538,14 @@ async def export_chart_of_accounts(
         db_to_use = tenant_db
     
     # Get company information
-    company_raw = await db_to_use.company_setups.find_one({"id": company_id})
+    company_raw = await db_to_use.company_setups.find_one({"id": company_id}, _NO_OBJECT_ID)
     if not company_raw:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    company = parse_from_mongo(company_raw)
+    company = company_raw
     
     # Get chart of accounts
-    accounts_raw = await db_to_use.chart_of_accounts.find({"company_id": company_id}).sort("account_code", 1).to_list(length=None)
-    accounts = [parse_from_mongo(account) for account in accounts_raw]
+    accounts = await db_to_use.chart_of_accounts.find({"company_id": company_id}, _NO_OBJECT_ID).sort("account_code", 1).to_list(length=None)
     
     if export_request.format.lower() == "excel":
         # Create Excel export data
@@ -2534,14 +2624,12 @@ async def export_consolidated_accounts(
         db_to_use = tenant_db
     
     # Get all companies
-    companies_raw = await db_to_use.company_setups.find().to_list(length=None)
-    companies = [parse_from_mongo(company) for company in companies_raw]
+    companies = await db_to_use.company_setups.find({}, _NO_OBJECT_ID).to_list(length=None)
     
     consolidated_accounts = []
     for company in companies:
         company_id = company.get('id')
-        accounts_raw = await db_to_use.chart_of_accounts.find({"company_id": company_id}).sort("account_code", 1).to_list(length=None)
-        accounts = [parse_from_mongo(account) for account in accounts_raw]
+        accounts = await db_to_use.chart_of_accounts.find({"company_id": company_id}, _NO_OBJECT_ID).sort("account_code", 1).to_list(length=None)
         
         # Add company information to each account
         for account in accounts:
@@ -2631,9 +2719,6 @@ async def get_business_intelligence_data(current_user: UserInDB = Depends(get_cu
         total_expenses = sum(account.get('current_balance', 0) for account in all_accounts if account.get('account_type') == 'expense')
         
         # Generate mock historical data for charts (in production, this would come from transactions)
-        from datetime import datetime, timedelta
-        import random
-        
         # Revenue trend (last 6 months)
         revenue_trend = []
         base_revenue = max(total_revenue, 50000)  # Minimum base revenue for demo
@@ -2791,7 +2876,6 @@ async def get_business_intelligence_data(current_user: UserInDB = Depends(get_cu
 @api_router.post("/admin/init-super-admin")
 async def init_super_admin():
     """Initialize super admin user - for development/testing purposes"""
-    from auth import ensure_super_admin
     try:
         await ensure_super_admin(db)
         return {"success": True, "message": "Super admin initialized successfully"}
@@ -2814,10 +2898,13 @@ async def check_super_admin():
 # Include the router in the main app
 app.include_router(api_router)
 
+# Strip so "a.com, b.com" in the environment matches both origins
+_CORS_ORIGINS = [origin.strip() for origin in os.environ.get('CORS_ORIGINS', '*').split(',')]
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_origins=_CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -2831,15 +2918,17 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_event():
-    # Initialize super admin and default admin
-    from auth import ensure_super_admin, create_default_admin
+    # Create the tenant service on the app's client so every tenant database shares one pool
+    await get_tenant_service(mongo_url, client)
+    await asyncio.gather(ensure_auth_indexes(db), ensure_crm_indexes(db))
     try:
-        await ensure_super_admin(db)
-        await create_default_admin(db)
+        # Seed both accounts together so their password hashing overlaps on the executor
+        await asyncio.gather(ensure_super_admin(db), create_default_admin(db))
         print("DEBUG: Super admin and default admin initialization completed")
     except Exception as e:
         print(f"ERROR: Failed to initialize admin users: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    await close_http_session()
+    await client.close()
@@ -11,12 +11,16 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_ALG_LIST = ["HS256"]
+
 class TenantMiddleware:
     """Middleware to handle tenant database routing"""
     
     def __init__(self, mongo_url: str):
         self.mongo_url = mongo_url
         self.security = HTTPBearer()
+        # Read and encoded once per instance instead of on every request
+        self.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here').encode("utf-8")
     
     async def get_tenant_database_from_token(self, credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())):
         """
@@ -24,10 +28,9 @@ class TenantMiddleware:
         """
         try:
             token = credentials.credentials
-            secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
             
             # Decode JWT token
-            payload = jwt.decode(token, secret_key, algorithms=["HS256"])
+            payload = jwt.decode(token, self.secret_key, algorithms=_ALG_LIST)
             user_email = payload.get("sub")
             
             if not user_email:
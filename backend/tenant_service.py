@@ -3,20 +3,44 @@ Multi-tenant database service for ZOIOS ERP
 Each group company gets its own database for complete data isolation
 """
 
+import os
 import re
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Dict, Optional
+from pymongo import AsyncMongoClient
+from typing import Any, Dict, Optional
 import logging
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+def mongo_client_options() -> Dict[str, Any]:
+    """
+    Client settings for AsyncMongoClient
+    Read at call time so values loaded from backend/.env apply
+    """
+    # The async client multiplexes concurrent operations over the pool, so a small warm pool beats the default of 100.
+    # The bounds apply per worker process; raise them for fewer, busier workers
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 32)),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", 8)),
+        "maxIdleTimeMS": 60000,
+        "serverSelectionTimeoutMS": 2000,
+        # Dates are stored as BSON dates (always UTC); decode them as aware datetimes so the
+        # API keeps emitting an explicit +00:00 offset instead of naive local-looking times
+        "tz_aware": True,
+    }
+    # Wire compression, e.g. "zstd,snappy,zlib"; zstd and snappy need their optional python packages
+    compressors = os.getenv("MONGO_COMPRESSORS")
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
 class TenantService:
     """Service for managing multi-tenant database architecture"""
     
-    def __init__(self, mongo_url: str):
+    def __init__(self, mongo_url: str, client: Optional[AsyncMongoClient] = None):
         self.mongo_url = mongo_url
-        self.client = AsyncIOMotorClient(mongo_url)
+        # Reuse the application's client when given so tenant databases share its connection pool
+        self.client = client if client is not None else AsyncMongoClient(mongo_url, **mongo_client_options())
         self.databases: Dict[str, any] = {}  # Cache for database connections
         
     def get_tenant_db_name(self, company_id: str) -> str:
@@ -196,11 +220,11 @@ class TenantService:
 # Global tenant service instance
 tenant_service = None
 
-async def get_tenant_service(mongo_url: str) -> TenantService:
+async def get_tenant_service(mongo_url: str, client: Optional[AsyncMongoClient] = None) -> TenantService:
     """Get or create tenant service instance"""
     global tenant_service
     if tenant_service is None:
-        tenant_service = TenantService(mongo_url)
+        tenant_service = TenantService(mongo_url, client)
     return tenant_service
 
 async def get_tenant_database_for_user(user_email: str, mongo_url: str):
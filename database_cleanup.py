@@ -12,7 +12,7 @@ Performs comprehensive cleanup of all database data as requested by user:
 
 import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from datetime import datetime
 import sys
 
@@ -22,7 +22,7 @@ db_name = os.environ.get('DB_NAME', 'zoios_crm')
 
 class DatabaseCleaner:
     def __init__(self):
-        self.client = AsyncIOMotorClient(mongo_url)
+        self.client = AsyncMongoClient(mongo_url)
         self.main_db = self.client[db_name]
         self.cleanup_stats = {}
         
@@ -356,7 +356,7 @@ class DatabaseCleaner:
             return False
         finally:
             # Close database connection
-            self.client.close()
+            await self.client.close()
 
 async def main():
     """Main function to run database cleanup"""
@@ -15,6 +15,8 @@ NC='\033[0m' # No Color
 APP_DIR="/opt/zoios-crm"
 APP_USER="www-data"
 BACKEND_PORT="8001"
+# One uvicorn worker per CPU unless overridden; workers share no in-process auth state
+BACKEND_WORKERS="${BACKEND_WORKERS:-$(nproc)}"
 FRONTEND_PORT="3000"
 
 # Functions
@@ -165,7 +167,7 @@ setup_services() {
     # Backend supervisor configuration
     cat > /etc/supervisor/conf.d/zoios-backend.conf << EOF
 [program:zoios-backend]
-command=$APP_DIR/backend/venv/bin/uvicorn server:app --host 0.0.0.0 --port $BACKEND_PORT
+command=$APP_DIR/backend/venv/bin/uvicorn server:app --host 0.0.0.0 --port $BACKEND_PORT --loop uvloop --http httptools --workers $BACKEND_WORKERS
 directory=$APP_DIR/backend
 user=$APP_USER
 autostart=true
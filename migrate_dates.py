@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Date Migration Script for ZOIOS ERP
+Converts legacy ISO-string timestamps to native BSON dates:
+1. Scans every collection in the main database and in each tenant database
+2. Finds documents whose date fields are still stored as strings
+3. Rewrites those fields as UTC datetimes in batched bulk writes
+Safe to re-run: documents that are already converted are not matched again
+"""
+
+import asyncio
+import os
+from pymongo import AsyncMongoClient, UpdateOne
+from datetime import datetime, timezone
+import sys
+
+# MongoDB connection
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('DB_NAME', 'zoios_crm')
+
+# Fields the application writes as datetimes
+DATE_FIELDS = ('created_at', 'updated_at', 'date', 'follow_up_date', 'last_updated', 'expires_at', 'consolidation_date')
+BATCH_SIZE = 1000
+
+class DateMigrator:
+    def __init__(self):
+        self.client = AsyncMongoClient(mongo_url)
+        self.main_db = self.client[db_name]
+        self.migration_stats = {}
+        self.unparsed = 0
+
+    def log(self, message, level="INFO"):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+
+    @staticmethod
+    def parse_date(value):
+        """Parse an ISO-8601 string; naive values were always written in UTC"""
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+
+    async def migrate_collection(self, db, collection_name):
+        """Convert string date fields in one collection, returning the number of documents updated"""
+        collection = db[collection_name]
+        string_dates = {"$or": [{field: {"$type": "string"}} for field in DATE_FIELDS]}
+        projection = {field: 1 for field in DATE_FIELDS}
+
+        updated = 0
+        operations = []
+        async for document in collection.find(string_dates, projection):
+            converted = {}
+            for field in DATE_FIELDS:
+                value = document.get(field)
+                if not isinstance(value, str):
+                    continue
+                try:
+                    converted[field] = self.parse_date(value)
+                except ValueError:
+                    self.unparsed += 1
+                    self.log(f"⚠️ {db.name}.{collection_name} {document['_id']}: cannot parse {field}={value!r}", "WARNING")
+            if converted:
+                operations.append(UpdateOne({"_id": document["_id"]}, {"$set": converted}))
+            if len(operations) >= BATCH_SIZE:
+                result = await collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                operations = []
+
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        return updated
+
+    async def migrate_database(self, db):
+        """Convert string dates in every collection of a database"""
+        total_updated = 0
+        for collection_name in await db.list_collection_names():
+            try:
+                updated = await self.migrate_collection(db, collection_name)
+                total_updated += updated
+                self.migration_stats[f"{db.name}.{collection_name}"] = updated
+                if updated:
+                    self.log(f"✅ Converted dates in {updated} documents of {db.name}.{collection_name}")
+            except Exception as e:
+                self.log(f"❌ Error migrating {db.name}.{collection_name}: {str(e)}", "ERROR")
+        return total_updated
+
+    async def run_migration(self):
+        """Migrate the main database and every tenant database"""
+        try:
+            self.log("🕒 Converting string dates in main database...")
+            main_updated = await self.migrate_database(self.main_db)
+
+            tenant_names = [name for name in await self.client.list_database_names() if name.startswith('zoios_tenant_')]
+            self.log(f"🔍 Found {len(tenant_names)} tenant databases")
+            tenant_updated = 0
+            for tenant_name in tenant_names:
+                tenant_updated += await self.migrate_database(self.client[tenant_name])
+
+            self.log("=" * 80)
+            self.log("🎯 DATE MIGRATION SUMMARY")
+            self.log("=" * 80)
+            self.log(f"📊 Main database documents updated: {main_updated}")
+            self.log(f"📊 Tenant database documents updated: {tenant_updated}")
+            self.log(f"📊 Values left unparsed: {self.unparsed}")
+            return self.unparsed == 0
+
+        except Exception as e:
+            self.log(f"❌ Date migration failed: {str(e)}", "ERROR")
+            return False
+        finally:
+            # Close database connection
+            await self.client.close()
+
+async def main():
+    """Main function to run the date migration"""
+    migrator = DateMigrator()
+    success = await migrator.run_migration()
+
+    if success:
+        print("\n🎉 DATE MIGRATION COMPLETED SUCCESSFULLY!")
+        sys.exit(0)
+    else:
+        print("\n❌ DATE MIGRATION INCOMPLETE!")
+        print("📝 Please check the logs above for details")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
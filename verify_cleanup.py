@@ -5,7 +5,7 @@ Simple verification script to confirm database cleanup was successful
 
 import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from datetime import datetime
 
 # MongoDB connection
@@ -14,7 +14,7 @@ db_name = os.environ.get('DB_NAME', 'zoios_crm')
 
 async def verify_cleanup():
     """Verify that database cleanup was successful"""
-    client = AsyncIOMotorClient(mongo_url)
+    client = AsyncMongoClient(mongo_url)
     main_db = client[db_name]
     
     print("🔍 Verifying database cleanup...")
@@ -47,7 +47,7 @@ async def verify_cleanup():
     else:
         print("✅ No tenant databases remaining")
     
-    client.close()
+    await client.close()
     
     if all_empty:
         print("🎉 DATABASE CLEANUP VERIFICATION SUCCESSFUL!")